@@ -1,7 +1,6 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { db } from '@/lib/firebase-admin';
-import { exec } from 'child_process';
-import { promisify } from 'util';
+import { spawn } from 'child_process';
 import { join } from 'path';
 import {
   checkRateLimit,
@@ -17,11 +16,18 @@ import {
   FilterOptions,
 } from '@/lib/twitter-ingestion';
 
-const execAsync = promisify(exec);
-
-const TARGET_USERS = ['KinchAnalytics', 'osirion_gg'];
+// Accounts are configured in scripts/scraper_config.json (or SCRAPER_TARGET_USERS);
+// this list is only used for logging when the env var isn't set
+const TARGET_USERS = (process.env.SCRAPER_TARGET_USERS || 'KinchAnalytics,osirion_gg')
+  .split(',')
+  .map(u => u.trim())
+  .filter(Boolean);
 // Script path relative to Next.js app root (apps/web)
-const PYTHON_SCRAPER_SCRIPT = join(process.cwd(), 'scripts', 'simple_scraper.py');
+// Fails over between the installed backends (snscrape, twscrape, Scweet)
+const PYTHON_SCRAPER_SCRIPT = join(process.cwd(), 'scripts', 'scrape.py');
+// Resident scraper (scripts/scraper_daemon.py); set to "off" to always spawn the script
+const SCRAPER_DAEMON_URL = process.env.SCRAPER_DAEMON_URL || 'http://127.0.0.1:8765';
+const SCRAPER_DAEMON_TIMEOUT_MS = 2000;
 
 interface ScrapedTweet {
   id: string;
@@ -33,34 +39,180 @@ interface ScrapedTweet {
   isReply: boolean;
 }
 
-async function runPythonScraper(): Promise<Record<string, ScrapedTweet[]>> {
-  // Check rate limit before scraping
-  const rateLimitCheck = await checkRateLimit('python-scraper');
-  if (!rateLimitCheck.allowed) {
-    throw new Error(`Rate limit exceeded. Please wait ${Math.ceil((rateLimitCheck.waitMs || 0) / 1000)} seconds.`);
+async function fetchFromDaemon(): Promise<Record<string, ScrapedTweet[]> | null> {
+  if (SCRAPER_DAEMON_URL === 'off') {
+    return null;
   }
 
-  return await retryWithBackoff(async () => {
-    // Try Python 3 first, then python
-    const pythonCmd = process.platform === 'win32' ? 'python' : 'python3';
-    
-    const { stdout, stderr } = await execAsync(
-      `${pythonCmd} "${PYTHON_SCRAPER_SCRIPT}"`,
-      { maxBuffer: 10 * 1024 * 1024 } // 10MB buffer
-    );
-
-    if (stderr) {
-      console.warn('[SCRAPER] Python stderr:', stderr);
+  try {
+    const response = await fetch(`${SCRAPER_DAEMON_URL}/tweets`, {
+      cache: 'no-store',
+      signal: AbortSignal.timeout(SCRAPER_DAEMON_TIMEOUT_MS),
+    });
+    if (!response.ok) {
+      console.warn(`[SCRAPER] Scraper daemon returned ${response.status}, spawning script instead`);
+      return null;
     }
 
-    const result = JSON.parse(stdout.trim());
-    
+    const result = await response.json();
     if (!result.success) {
-      throw new Error(result.error || 'Scraper failed');
+      console.warn(`[SCRAPER] Scraper daemon has no results (${result.error}), spawning script instead`);
+      return null;
     }
 
+    console.log(`[SCRAPER] Using scraper daemon results from ${result.polledAt}`);
     return result.tweets || {};
-  }, 3, 1000);
+  } catch (error: any) {
+    // Daemon not running; the spawned script still works on its own
+    console.warn('[SCRAPER] Scraper daemon unavailable, spawning script instead:', error.message);
+    return null;
+  }
+}
+
+type UserHandler = (username: string, tweets: ScrapedTweet[]) => Promise<void>;
+
+interface ScraperSummary {
+  success: boolean;
+  error?: string;
+  counts?: Record<string, number>;
+  errors?: Record<string, string>;
+}
+
+// Runs the scraper with --stream and hands each user's tweets to onUser as soon as
+// that user finishes, while the others are still being scraped. If the process dies
+// mid-run, whatever tweets already arrived are still handed over.
+// `cursors` (username -> lastTweetId) replace the script's own high-water marks, so tweets
+// are only skipped once this route has ingested them.
+function streamPythonScraper(onUser: UserHandler, cursors: Record<string, string> | null): Promise<ScraperSummary> {
+  return new Promise((resolve, reject) => {
+    // Try Python 3 first, then python
+    const pythonCmd = process.platform === 'win32' ? 'python' : 'python3';
+    const args = [PYTHON_SCRAPER_SCRIPT, '--stream'];
+    if (cursors) {
+      args.push('--since', JSON.stringify(cursors));
+    }
+    const child = spawn(pythonCmd, args);
+
+    const pending: Record<string, ScrapedTweet[]> = {};
+    const ingestions: Promise<void>[] = [];
+    let summary: ScraperSummary | null = null;
+    let received = 0;
+    let buffer = '';
+    let stderr = '';
+
+    const handleLine = (line: string) => {
+      let record: any;
+      try {
+        record = JSON.parse(line);
+      } catch {
+        console.warn('[SCRAPER] Ignoring malformed scraper output:', line.slice(0, 200));
+        return;
+      }
+
+      if (record.type === 'tweet') {
+        const { type, ...tweet } = record;
+        if (!pending[tweet.username]) {
+          pending[tweet.username] = [];
+        }
+        pending[tweet.username].push(tweet as ScrapedTweet);
+        received++;
+      } else if (record.type === 'user') {
+        const tweets = pending[record.username] || [];
+        delete pending[record.username];
+        if (record.error) {
+          console.warn(`[SCRAPER] Scraping ${record.username} failed: ${record.error}`);
+        }
+        ingestions.push(onUser(record.username, tweets));
+      } else if (record.type === 'summary') {
+        summary = record;
+      }
+    };
+
+    child.stdout.setEncoding('utf8');
+    child.stdout.on('data', (chunk: string) => {
+      buffer += chunk;
+      let newline: number;
+      while ((newline = buffer.indexOf('\n')) >= 0) {
+        const line = buffer.slice(0, newline).trim();
+        buffer = buffer.slice(newline + 1);
+        if (line) {
+          handleLine(line);
+        }
+      }
+    });
+    child.stderr.setEncoding('utf8');
+    child.stderr.on('data', (chunk: string) => {
+      stderr += chunk;
+    });
+    child.on('error', reject);
+
+    child.on('close', async (code) => {
+      if (buffer.trim()) {
+        handleLine(buffer.trim());
+      }
+      if (stderr) {
+        console.warn('[SCRAPER] Python stderr:', stderr);
+      }
+
+      // Users the scraper never finished still get the tweets that made it out
+      for (const [username, tweets] of Object.entries(pending)) {
+        ingestions.push(onUser(username, tweets));
+      }
+      const outcomes = await Promise.allSettled(ingestions);
+      const failed = outcomes.find((o): o is PromiseRejectedResult => o.status === 'rejected');
+
+      // Once a tweet was streamed it has been handed to ingestion, and a retry would ingest it again,
+      // so only a run that produced no tweets rejects (users without tweets write nothing)
+      const streamed = received > 0;
+      const result = summary as ScraperSummary | null;
+      if (!streamed) {
+        if (result && result.success) {
+          resolve(result);
+        } else {
+          reject(new Error(result?.error || `Scraper exited with code ${code} without output`));
+        }
+      } else if (failed) {
+        console.error('[SCRAPER] Ingesting streamed tweets failed:', failed.reason);
+        resolve({ ...(result || {}), success: false, error: failed.reason?.message || String(failed.reason) });
+      } else if (result) {
+        resolve(result);
+      } else {
+        console.warn(`[SCRAPER] Scraper exited with code ${code} before finishing; kept ${received} streamed tweets`);
+        resolve({ success: false, error: `Scraper exited with code ${code}` });
+      }
+    });
+  });
+}
+
+async function runPythonScraper(onUser: UserHandler): Promise<ScraperSummary> {
+  // Check rate limit before scraping
+  const rateLimitCheck = await checkRateLimit('python-scraper');
+  if (!rateLimitCheck.allowed) {
+    throw new Error(`Rate limit exceeded. Please wait ${Math.ceil((rateLimitCheck.waitMs || 0) / 1000)} seconds.`);
+  }
+
+  const cursors = await getLastTweetIds();
+  // streamPythonScraper only rejects when no tweet was streamed, so a retry never ingests a tweet twice
+  return await retryWithBackoff(() => streamPythonScraper(onUser, cursors), 3, 1000);
+}
+
+// Every account's lastTweetId, keyed like the twitter_last_tweet docs (lowercase username).
+// Null if they can't be read; the script then falls back to its own state file.
+async function getLastTweetIds(): Promise<Record<string, string> | null> {
+  try {
+    const snapshot = await db.collection('twitter_last_tweet').get();
+    const cursors: Record<string, string> = {};
+    snapshot.forEach(doc => {
+      const lastTweetId = doc.data()?.lastTweetId;
+      if (lastTweetId) {
+        cursors[doc.id] = lastTweetId;
+      }
+    });
+    return cursors;
+  } catch (error: any) {
+    console.error('[SCRAPER] Error reading lastTweetIds, using the scraper state file:', error.message);
+    return null;
+  }
 }
 
 async function getLastTweetId(username: string): Promise<string | null> {
@@ -213,16 +365,12 @@ export async function GET(req: NextRequest) {
 
     console.log(`[SCRAPER] Starting self-hosted Twitter scraping for users: ${TARGET_USERS.join(', ')}`);
 
-    const scrapedTweets = await runPythonScraper();
-    console.log(`[SCRAPER] Scraped tweets:`, Object.keys(scrapedTweets).map(u => `${u}: ${scrapedTweets[u].length}`).join(', '));
-
     const results: Record<string, { processed: number; errors: number; filtered: number }> = {};
     const allProcessedTweets: ProcessedTweet[] = [];
 
-    for (const username of TARGET_USERS) {
-      const tweets = scrapedTweets[username] || [];
-      const result = await processTweets(username, tweets);
-      results[username] = result;
+    const handleUser: UserHandler = async (username, tweets) => {
+      console.log(`[SCRAPER] Scraped ${tweets.length} tweets for ${username}`);
+      results[username] = await processTweets(username, tweets);
 
       // Collect all processed tweets for final formatting
       const processedTweets: ProcessedTweet[] = tweets.map(t => ({
@@ -235,6 +383,19 @@ export async function GET(req: NextRequest) {
         isReply: t.isReply,
       }));
       allProcessedTweets.push(...processedTweets);
+    };
+
+    const daemonTweets = await fetchFromDaemon();
+    if (daemonTweets) {
+      for (const username of Object.keys(daemonTweets)) {
+        await handleUser(username, daemonTweets[username] || []);
+      }
+    } else {
+      // Ingestion starts per user while the scraper is still running
+      const summary = await runPythonScraper(handleUser);
+      if (!summary.success) {
+        console.warn(`[SCRAPER] Scrape did not fully finish (${summary.error}); ingested partial results`);
+      }
     }
 
     const totalProcessed = Object.values(results).reduce((sum, r) => sum + r.processed, 0);
@@ -247,7 +408,7 @@ export async function GET(req: NextRequest) {
       totalProcessed,
       totalErrors,
       totalFiltered,
-      'self-hosted-python'
+      daemonTweets ? 'self-hosted-daemon' : 'self-hosted-python'
     );
 
     return NextResponse.json({
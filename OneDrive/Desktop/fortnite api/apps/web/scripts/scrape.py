@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Twitter scraper with automatic failover across snscrape, twscrape and Scweet
+Fetches tweets from target accounts and outputs JSON for ingestion
+
+    python scripts/scrape.py [--backend NAME ...] [--mode single|failover|hedge]
+
+Backends, mode and limits are configured in scraper_config.json (see README.md).
+"""
+
+from scrapers import cli
+
+
+if __name__ == "__main__":
+    cli.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Resident Twitter scraper: polls on its own schedule and serves the latest
+tweets over local HTTP, so the API route doesn't spawn Python per request.
+
+    python scripts/scraper_daemon.py
+
+Endpoints (bound to 127.0.0.1 by default):
+    GET  /tweets    {success, tweets: {user: [...]}, timestamp, polledAt}
+    POST /refresh   polls now; ?wait=1 blocks until the poll finishes
+    GET  /healthz   poll counters, last error and backend breaker states
+
+Holds one scrapers.Scraper for its lifetime. Interpreter startup and
+imports are paid once, snscrape's module-level guest token and twscrape's
+API and account pool are reused between polls, and circuit breakers live in
+memory. Each poll is incremental. New tweets are merged into a
+per-user buffer of the most recent BUFFER_SIZE tweets, so nothing is lost
+when polls run faster than the route reads. The route's own lastTweetId
+check skips tweets it has already ingested.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+from scrapers import Scraper, load_config
+
+HOST = os.getenv("SCRAPER_DAEMON_HOST", "127.0.0.1")
+PORT = int(os.getenv("SCRAPER_DAEMON_PORT", 8765))
+POLL_SECONDS = float(os.getenv("SCRAPER_POLL_SECONDS", 300))
+BUFFER_SIZE = int(os.getenv("SCRAPER_BUFFER_SIZE", 200))
+
+
+class TweetCache:
+    """Latest tweets per user, newest first, plus poll bookkeeping."""
+
+    def __init__(self, buffer_size: int = BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.tweets: Dict[str, List[Dict]] = {}
+        self.timestamp = None
+        self.polled_at = None
+        self.polls = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_duration = None
+        self._lock = threading.Lock()
+
+    def merge(self, result: Dict, duration: float):
+        with self._lock:
+            self.polls += 1
+            self.polled_at = time.time()
+            self.last_duration = round(duration, 2)
+            if not result.get("success"):
+                self.failures += 1
+                self.last_error = result.get("error")
+                return
+            self.last_error = None
+            self.timestamp = result.get("timestamp")
+            for username, new in (result.get("tweets") or {}).items():
+                merged = {t["id"]: t for t in self.tweets.get(username, [])}
+                merged.update((t["id"], t) for t in new)
+                newest_first = sorted(merged.values(), key=lambda t: int(t["id"]), reverse=True)
+                self.tweets[username] = newest_first[:self.buffer_size]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            if self.timestamp is None:
+                # Nothing scraped yet; report why so the caller can fall back
+                return {"success": False, "error": self.last_error or "No poll has completed yet", "tweets": {}}
+            return {
+                "success": True,
+                "tweets": {u: list(t) for u, t in self.tweets.items()},
+                "timestamp": self.timestamp,
+                "polledAt": datetime.utcfromtimestamp(self.polled_at).isoformat(),
+                "lastError": self.last_error,
+            }
+
+    def health(self) -> Dict:
+        with self._lock:
+            return {
+                "polls": self.polls,
+                "failures": self.failures,
+                "lastError": self.last_error,
+                "lastPollSeconds": self.last_duration,
+                "polledAt": datetime.utcfromtimestamp(self.polled_at).isoformat() if self.polled_at else None,
+                "pollSeconds": POLL_SECONDS,
+                "users": {u: len(t) for u, t in self.tweets.items()},
+            }
+
+
+class Poller:
+    """Runs Scraper.scrape_all() every POLL_SECONDS, or sooner when asked."""
+
+    def __init__(self, scraper: Scraper, cache: TweetCache, interval: float = POLL_SECONDS):
+        self.scraper = scraper
+        self.cache = cache
+        self.interval = interval
+        self._wake = threading.Event()
+        self._done = threading.Condition()
+        self._completed = 0
+        self._poll_lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, name="scraper-poller", daemon=True).start()
+
+    def request(self, wait: bool = False, timeout: float = 120):
+        """Wakes the poller; with `wait`, blocks until a poll started after this call finishes."""
+        with self._done:
+            # A poll already running may have started before the request, so wait for the next one
+            target = self._completed + (2 if self._poll_lock.locked() else 1)
+        self._wake.set()
+        if wait:
+            with self._done:
+                self._done.wait_for(lambda: self._completed >= target, timeout)
+
+    def poll(self):
+        with self._poll_lock:
+            started = time.time()
+            try:
+                result = self.scraper.scrape_all()
+            except Exception as e:
+                result = {"success": False, "error": str(e), "tweets": {}}
+            self.cache.merge(result, time.time() - started)
+            # Tweets are in the buffer now, so the marks can move
+            self.scraper.save()
+            print(f"[daemon] Poll finished in {time.time() - started:.1f}s: "
+                  + (", ".join(f"{u}: {len(t)} new" for u, t in result["tweets"].items())
+                     if result.get("success") else f"failed ({result.get('error')})"),
+                  file=sys.stderr)
+        with self._done:
+            self._completed += 1
+            self._done.notify_all()
+
+    def _run(self):
+        while True:
+            # Cleared before polling, so a refresh asked for mid-poll triggers another
+            self._wake.clear()
+            self.poll()
+            self._wake.wait(self.interval)
+
+
+def make_handler(scraper: Scraper, cache: TweetCache, poller: Poller):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: Dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/tweets":
+                self._send(200, cache.snapshot())
+            elif path == "/healthz":
+                self._send(200, dict(cache.health(), backends=scraper.health()))
+            else:
+                self._send(404, {"error": "Not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/refresh":
+                self._send(404, {"error": "Not found"})
+                return
+            wait = parse_qs(url.query).get("wait", ["0"])[0] in ("1", "true")
+            poller.request(wait=wait)
+            self._send(200, cache.snapshot() if wait else {"success": True, "queued": True})
+
+        def log_message(self, format, *args):
+            # Request lines go to stderr like the scrapers' own logging
+            print(f"[daemon] {self.address_string()} {format % args}", file=sys.stderr)
+
+    return Handler
+
+
+def main():
+    """Entry point"""
+    scraper = Scraper(load_config())
+    cache = TweetCache()
+    poller = Poller(scraper, cache)
+    poller.start()
+    server = ThreadingHTTPServer((HOST, PORT), make_handler(scraper, cache, poller))
+    print(f"[daemon] Serving on http://{HOST}:{PORT}, polling every {POLL_SECONDS:.0f}s "
+          f"for {', '.join(scraper.config['targetUsers'])} via {', '.join(s.name for s in scraper.slots) or 'no backend'}",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Twitter scraper package: snscrape, twscrape and Scweet backends behind one
+interface, with shared filtering, incremental state, failover, hedging and
+circuit breakers. scrape.py and scraper_daemon.py are the entry points.
+"""
+
+from .backends import BACKENDS, Backend
+from .common import ScrapeState, TokenBucket, load_config
+from .runner import CircuitBreaker, ScrapeError, Scraper
+from .tweets import Collector, keep, make_tweet
+
+__all__ = [
+    "BACKENDS",
+    "Backend",
+    "CircuitBreaker",
+    "Collector",
+    "ScrapeError",
+    "ScrapeState",
+    "Scraper",
+    "TokenBucket",
+    "keep",
+    "load_config",
+    "make_tweet",
+]
@@ -0,0 +1,162 @@
+"""
+Scraping backends: snscrape, twscrape and Scweet behind one interface.
+
+A backend's fetch(username, collector) pages through the user's tweets,
+newest first, turning each into the common shape with make_tweet() and
+offering it to the collector until the collector says stop. Errors are
+raised rather than swallowed, so the runner can fail over to another
+backend and count the failure against this one's circuit breaker.
+"""
+
+import asyncio
+import sys
+import threading
+
+from .tweets import Collector, make_tweet
+
+try:
+    import snscrape.modules.twitter as sntwitter
+    SNSCRAPE_AVAILABLE = True
+except ImportError:
+    SNSCRAPE_AVAILABLE = False
+
+try:
+    from twscrape import API
+    TWSCRAPE_AVAILABLE = True
+except ImportError:
+    TWSCRAPE_AVAILABLE = False
+
+try:
+    from scweet.scweet import scrape
+    SCWEET_AVAILABLE = True
+except ImportError:
+    SCWEET_AVAILABLE = False
+
+
+class Backend:
+    """One scraping library. Instances are long-lived and shared by all fetches."""
+
+    name = ""
+    available = False
+    install_hint = ""
+
+    def fetch(self, username: str, collector: Collector):
+        raise NotImplementedError
+
+
+class SnscrapeBackend(Backend):
+    """snscrape search (free, no API or accounts needed)."""
+
+    name = "snscrape"
+    available = SNSCRAPE_AVAILABLE
+    install_hint = "pip install snscrape"
+
+    def fetch(self, username, collector):
+        query = f"from:{username}"
+        if collector.since_id is not None:
+            # Let search skip everything up to the last tweet we emitted
+            query += f" since_id:{collector.since_id}"
+        print(f"Querying: {query}", file=sys.stderr)
+
+        for i, tweet in enumerate(sntwitter.TwitterSearchScraper(query).get_items()):
+            try:
+                item = make_tweet(
+                    tweet.id,
+                    tweet.rawContent or tweet.content,
+                    username,
+                    created_at=tweet.date,
+                    url=tweet.url,
+                    is_retweet=tweet.retweetedTweet is not None,
+                    is_reply=tweet.inReplyToTweetId is not None,
+                )
+            except Exception as e:
+                print(f"Error processing tweet {i}: {str(e)}", file=sys.stderr)
+                continue
+            if not collector.add(item):
+                break
+
+
+class TwscrapeBackend(Backend):
+    """twscrape timelines (needs Twitter accounts added with `twscrape add_accounts`).
+
+    twscrape is async; the API and its account pool live on one event loop
+    in a background thread, so they stay warm across fetches and threads.
+    """
+
+    name = "twscrape"
+    available = TWSCRAPE_AVAILABLE
+    install_hint = "pip install twscrape"
+
+    def __init__(self):
+        self._loop = None
+        self._api = None
+        self._lock = threading.Lock()
+
+    def _run(self, coro):
+        with self._lock:
+            if self._loop is None:
+                # Proactor loops don't work with twscrape on Windows
+                self._loop = asyncio.SelectorEventLoop() if sys.platform == "win32" else asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="twscrape-loop", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def fetch(self, username, collector):
+        self._run(self._fetch(username, collector))
+
+    async def _fetch(self, username, collector):
+        if self._api is None:
+            # Uses the default account pool
+            self._api = API()
+        async for tweet in self._api.user_timeline(username, limit=collector.scan_limit):
+            item = make_tweet(
+                tweet.id,
+                tweet.rawContent or getattr(tweet, "fullText", None),
+                username,
+                created_at=getattr(tweet, "date", None),
+                is_retweet=bool(getattr(tweet, "retweetedTweet", None)),
+                is_reply=bool(tweet.inReplyToStatusId),
+            )
+            if not collector.add(item):
+                break
+
+
+class ScweetBackend(Backend):
+    """Scweet (Selenium/Playwright browser), slow but independent of the search API."""
+
+    name = "scweet"
+    available = SCWEET_AVAILABLE
+    install_hint = "pip install scweet"
+
+    def fetch(self, username, collector):
+        # Scweet returns a whole batch per call, so it can't stop early;
+        # the collector still drops already-seen tweets
+        data = scrape(
+            users=[username],
+            limit=collector.limit,
+            interval=1,
+            headless=True,
+            display_type="Latest",
+            resume=False,
+            save_dir="",
+            filter_replies=collector.config["excludeReplies"],
+        )
+        items = []
+        for tweet in data or []:
+            tweet_id = tweet.get("ID", "")
+            if not tweet_id:
+                continue
+            items.append(make_tweet(
+                tweet_id,
+                tweet.get("Tweet", ""),
+                username,
+                created_at=tweet.get("Timestamp"),
+                url=tweet.get("Tweet URL"),
+                is_retweet=tweet.get("isRetweet", False),
+                is_reply=tweet.get("isReply", False),
+            ))
+        for item in sorted(items, key=lambda t: int(t["id"]), reverse=True):
+            if not collector.add(item):
+                break
+
+
+BACKENDS = {b.name: b for b in (SnscrapeBackend, TwscrapeBackend, ScweetBackend)}
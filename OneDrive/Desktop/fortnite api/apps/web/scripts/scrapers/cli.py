@@ -0,0 +1,88 @@
+"""
+Command-line entry point shared by scrape.py and the single-backend scripts.
+
+By default prints one JSON line, {success, tweets: {user: [...]}, timestamp},
+to stdout once every user is done. With --stream it prints NDJSON as the
+run goes instead:
+
+    {"type": "tweet", "id": ..., "text": ..., "username": ..., ...}   one per tweet, as parsed
+    {"type": "user", "username": ..., "count": ..., "backend": ..., "error": ...}   as each user finishes
+    {"type": "summary", "success": ..., "counts": {user: n}, ...}   last
+
+Logging always goes to stderr. The process exits as soon as the output is
+written, without waiting for hedged attempts that lost.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+
+from .backends import BACKENDS
+from .common import MODES, load_config
+from .runner import Scraper
+
+
+class _NdjsonWriter:
+    """Writes whole lines to stdout from any thread, flushing each one."""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self.out.write(line)
+            self.out.flush()
+
+
+def main(argv: Optional[List[str]] = None, backends: Optional[List[str]] = None):
+    """Entry point; `backends` pins the backends a wrapper script uses unless --backend is given."""
+    _run(argv, backends)
+    # A losing hedged attempt can't be cancelled, and the interpreter would wait for its
+    # pool thread before exiting, holding up the caller until the slow backend answers
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
+
+
+def _run(argv: Optional[List[str]], backends: Optional[List[str]]):
+    parser = argparse.ArgumentParser(description="Scrape recent tweets from the configured accounts.")
+    parser.add_argument("--backend", action="append", choices=sorted(BACKENDS),
+                        help="backend to use, repeatable, in order of preference (default: backendOrder from the config)")
+    parser.add_argument("--mode", choices=MODES, help="single, failover or hedge (default: from the config)")
+    parser.add_argument("--stream", action="store_true",
+                        help="write NDJSON: each tweet as it is parsed, a record per finished user, then a summary")
+    parser.add_argument("--since", type=json.loads, metavar="JSON",
+                        help='{"user": "tweetId", ...}: the caller\'s own cursors, used instead of the state file\'s marks')
+    args = parser.parse_args(argv)
+
+    config = load_config({"mode": args.mode} if args.mode else None)
+    scraper = Scraper(config, args.backend or backends)
+    if args.since is not None:
+        scraper.state.use_cursors(args.since)
+
+    if not args.stream:
+        result = scraper.scrape_all()
+        print(json.dumps(result))
+        # Marks only move for users whose tweets were just printed; breakers are saved either way
+        scraper.save()
+        return
+
+    writer = _NdjsonWriter()
+
+    def on_tweet(tweet: Dict):
+        writer.write({"type": "tweet", **tweet})
+
+    def on_user(username: str, tweets: List[Dict], backend: Optional[str], error: Optional[str]):
+        writer.write({"type": "user", "username": username, "count": len(tweets), "backend": backend, "error": error})
+        # This user's tweets are out, so a crash later in the run won't re-send them (with --since
+        # the marks are the caller's, and only breaker state is saved)
+        scraper.save()
+
+    result = scraper.scrape_all(on_tweet=on_tweet, on_user=on_user)
+    writer.write({"type": "summary", **result})
+    scraper.save()
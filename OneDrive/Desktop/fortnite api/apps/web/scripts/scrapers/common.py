@@ -0,0 +1,256 @@
+"""
+Config loading, rate limiting and the incremental-scrape state shared by
+all scraper backends.
+
+Target accounts and limits come from scraper_config.json in the scripts
+directory (or the file named by SCRAPER_CONFIG), and SCRAPER_* environment
+variables override it. Every account fetch takes a token from its
+backend's token bucket.
+
+With `incremental` on (the default), each user's newest emitted tweet ID
+and timestamp are kept in .scraper_state.json (SCRAPER_STATE), and the
+backends stop paging once they reach a tweet they have already emitted.
+The same file remembers open circuit breakers between runs. A caller that
+keeps its own per-user cursor, like the API route, passes it in with
+use_cursors() instead, and the file's marks are left alone.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(SCRIPTS_DIR, "scraper_config.json")
+STATE_PATH = os.path.join(SCRIPTS_DIR, ".scraper_state.json")
+
+DEFAULTS = {
+    "targetUsers": ["KinchAnalytics", "osirion_gg"],
+    "maxTweetsPerUser": 20,
+    "excludeRetweets": True,
+    "excludeReplies": True,
+    # Only emit tweets newer than the last run's
+    "incremental": True,
+    # Backends to use, in order of preference; ones that aren't installed are skipped
+    "backendOrder": ["snscrape", "twscrape", "scweet"],
+    # "single": first backend whose breaker is closed, no retry; "failover": next backend on error;
+    # "hedge": also start the next backend once hedgeAfterSeconds pass
+    "mode": "failover",
+    "hedgeAfterSeconds": 20,
+    # Circuit breaker: skip a backend after this many failures in a row, retry it after resetSeconds
+    "breakerFailures": 3,
+    "breakerResetSeconds": 600,
+    # Per backend: parallel account fetches, and account fetches per second (with burst)
+    "backends": {
+        "snscrape": {"concurrency": 4, "ratePerSecond": 0.5, "burst": 2},
+        "twscrape": {"concurrency": 4, "ratePerSecond": 1.0, "burst": 4},
+        "scweet": {"concurrency": 2, "ratePerSecond": 0.2, "burst": 1},
+    },
+}
+
+MODES = ("single", "failover", "hedge")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_list(name: str) -> Optional[List[str]]:
+    value = os.getenv(name)
+    if not value:
+        return None
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def load_config(overrides: Optional[Dict] = None) -> Dict:
+    """Returns the scraper settings.
+
+    Precedence: `overrides` (command-line flags), then SCRAPER_* env vars,
+    then the JSON config file, then DEFAULTS.
+    """
+    config = dict(DEFAULTS)
+
+    path = os.getenv("SCRAPER_CONFIG", CONFIG_PATH)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                config.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read {path}: {str(e)}", file=sys.stderr)
+    elif "SCRAPER_CONFIG" in os.environ:
+        print(f"Warning: config file {path} not found, using defaults", file=sys.stderr)
+
+    users = _env_list("SCRAPER_TARGET_USERS")
+    if users:
+        config["targetUsers"] = users
+    config["targetUsers"] = [u.lstrip("@") for u in config["targetUsers"]]
+    if os.getenv("SCRAPER_MAX_TWEETS_PER_USER"):
+        config["maxTweetsPerUser"] = int(os.getenv("SCRAPER_MAX_TWEETS_PER_USER"))
+    config["excludeRetweets"] = _env_bool("SCRAPER_EXCLUDE_RETWEETS", config["excludeRetweets"])
+    config["excludeReplies"] = _env_bool("SCRAPER_EXCLUDE_REPLIES", config["excludeReplies"])
+    config["incremental"] = _env_bool("SCRAPER_INCREMENTAL", config["incremental"])
+    config["statePath"] = os.getenv("SCRAPER_STATE", config.get("statePath") or STATE_PATH)
+    config["backendOrder"] = _env_list("SCRAPER_BACKENDS") or config["backendOrder"]
+    config["mode"] = os.getenv("SCRAPER_MODE", config["mode"])
+    if os.getenv("SCRAPER_HEDGE_AFTER_SECONDS"):
+        config["hedgeAfterSeconds"] = float(os.getenv("SCRAPER_HEDGE_AFTER_SECONDS"))
+
+    config.update(overrides or {})
+    if config["mode"] not in MODES:
+        print(f"Warning: unknown scraper mode {config['mode']!r}, using failover", file=sys.stderr)
+        config["mode"] = "failover"
+    return config
+
+
+def backend_settings(config: Dict, name: str) -> Dict:
+    """Concurrency and rate limit for one backend, with SCRAPER_CONCURRENCY / SCRAPER_RATE_PER_SECOND applied."""
+    settings = dict(DEFAULTS["backends"].get(name, {}))
+    settings.update((config.get("backends") or {}).get(name, {}))
+    if os.getenv("SCRAPER_CONCURRENCY"):
+        settings["concurrency"] = int(os.getenv("SCRAPER_CONCURRENCY"))
+    if os.getenv("SCRAPER_RATE_PER_SECOND"):
+        settings["ratePerSecond"] = float(os.getenv("SCRAPER_RATE_PER_SECOND"))
+    return {
+        "concurrency": max(1, int(settings.get("concurrency", 1))),
+        "ratePerSecond": float(settings.get("ratePerSecond", 0.5)),
+        "burst": max(1, int(settings.get("burst", 1))),
+    }
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `burst`.
+
+    reserve() takes a token right away and returns how long the caller must
+    wait before using it, so waiting happens outside the lock.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # Negative balance means the token is borrowed from the future
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ScrapeState:
+    """Per-user high-water mark (newest tweet ID and timestamp emitted so far) plus breaker state.
+
+    Tweet IDs are snowflakes, so a larger ID is a newer tweet. With
+    `enabled` off every tweet counts as new and the marks never move.
+    """
+
+    def __init__(self, path: str = STATE_PATH, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._users = {}
+        self._breakers = {}
+        # Caller-owned marks from use_cursors(); they replace the file's and never move
+        self._cursors = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._users = data.get("users", {})
+                self._breakers = data.get("breakers", {})
+            except (OSError, ValueError) as e:
+                # A corrupt state file only costs one full scrape
+                print(f"Warning: ignoring unreadable state file {path}: {str(e)}", file=sys.stderr)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "ScrapeState":
+        return cls(config["statePath"], config["incremental"])
+
+    def use_cursors(self, cursors: Dict[str, Optional[str]]):
+        """Uses the caller's newest ingested tweet ID per user as the marks for this run.
+
+        The caller moves its cursors only once it has ingested the tweets, so
+        a batch it never ingests is fetched again next time. Users without a
+        cursor get a full scrape.
+        """
+        with self._lock:
+            self._cursors = {u.lower(): str(i) for u, i in cursors.items() if i}
+
+    def last_id(self, username: str) -> Optional[int]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._cursors is not None:
+                cursor = self._cursors.get(username.lower())
+                return int(cursor) if cursor else None
+            entry = self._users.get(username.lower())
+        return int(entry["lastTweetId"]) if entry else None
+
+    def is_new(self, username: str, tweet_id) -> bool:
+        last = self.last_id(username)
+        return last is None or int(tweet_id) > last
+
+    def advance(self, username: str, tweets: List[Dict]):
+        """Moves the user's mark to the newest of `tweets` (no-op if none are newer)."""
+        if not self.enabled or not tweets:
+            return
+        newest = max(tweets, key=lambda t: int(t["id"]))
+        with self._lock:
+            if self._cursors is not None:
+                return
+            entry = self._users.get(username.lower())
+            if entry and int(entry["lastTweetId"]) >= int(newest["id"]):
+                return
+            self._users[username.lower()] = {
+                "lastTweetId": str(newest["id"]),
+                "lastCreatedAt": newest.get("createdAt"),
+                "updatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            self._dirty = True
+
+    def breaker(self, backend: str) -> Dict:
+        with self._lock:
+            return dict(self._breakers.get(backend, {}))
+
+    def set_breaker(self, backend: str, data: Dict):
+        with self._lock:
+            if self._breakers.get(backend) != data:
+                self._breakers[backend] = data
+                self._dirty = True
+
+    def save(self):
+        """Writes the state atomically; call once the tweets have been handed off."""
+        # Serialized so an older snapshot never replaces a newer one
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps({"users": self._users, "breakers": self._breakers}, indent=2)
+                self._dirty = False
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Warning: could not save state file {self.path}: {str(e)}", file=sys.stderr)
@@ -0,0 +1,289 @@
+"""
+Runs the configured backends for every target user, with failover,
+hedged requests and per-backend circuit breakers.
+
+Each user is fetched from the first backend in `backendOrder` whose
+breaker allows it. In "failover" mode, an error moves on to the next
+backend. In "hedge" mode the next backend is also started once the
+running ones have taken `hedgeAfterSeconds`, and the first successful
+answer wins. A losing attempt can't be cancelled mid-request: it runs
+to completion, its result is dropped, and its outcome still counts
+toward its breaker.
+"""
+
+import itertools
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .backends import BACKENDS
+from .common import ScrapeState, TokenBucket, backend_settings
+from .tweets import Collector
+
+
+class ScrapeError(Exception):
+    """Raised when no backend could fetch a user's tweets."""
+
+
+class CircuitBreaker:
+    """Stops using a backend after `failures` failures in a row.
+
+    Once open, one trial call is let through every `reset_seconds`. Success
+    closes the breaker; failure keeps it open for another period.
+    """
+
+    def __init__(self, failures: int = 3, reset_seconds: float = 600):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.consecutive = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.time() - self.opened_at >= self.reset_seconds and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self.consecutive = 0
+                self.opened_at = None
+                return
+            self.consecutive += 1
+            if self.consecutive >= self.failures:
+                self.opened_at = time.time()
+
+    def to_dict(self) -> Dict:
+        return {"consecutiveFailures": self.consecutive, "openedAt": self.opened_at}
+
+    def load(self, data: Dict):
+        self.consecutive = int(data.get("consecutiveFailures", 0))
+        self.opened_at = data.get("openedAt")
+
+
+class _UserStream:
+    """Passes one user's tweets to `on_tweet` as they are parsed, without duplicates.
+
+    With hedging or failover several attempts may parse the same user.
+    The first attempt to produce a tweet owns the stream, and the others
+    stay quiet unless it fails. Once a winner is known, finish() sends
+    whatever of its tweets the stream hasn't carried yet and closes it.
+    """
+
+    def __init__(self, on_tweet: Callable[[Dict], None]):
+        self.on_tweet = on_tweet
+        self.owner = None
+        self.done = False
+        self._ids = set()
+        self._lock = threading.Lock()
+
+    def _emit(self, tweet: Dict):
+        if tweet["id"] not in self._ids:
+            self._ids.add(tweet["id"])
+            self.on_tweet(tweet)
+
+    def offer(self, attempt: int, tweet: Dict):
+        with self._lock:
+            if self.done:
+                return
+            if self.owner is None:
+                self.owner = attempt
+            if self.owner == attempt:
+                self._emit(tweet)
+
+    def release(self, attempt: int):
+        with self._lock:
+            if self.owner == attempt:
+                self.owner = None
+
+    def finish(self, tweets: List[Dict]):
+        with self._lock:
+            self.done = True
+            for tweet in tweets:
+                self._emit(tweet)
+
+
+class _Slot:
+    """A backend with its concurrency limit, rate limiter and breaker."""
+
+    def __init__(self, backend, settings: Dict, breaker: CircuitBreaker):
+        self.backend = backend
+        self.name = backend.name
+        self.settings = settings
+        self.semaphore = threading.BoundedSemaphore(settings["concurrency"])
+        self.bucket = TokenBucket(settings["ratePerSecond"], settings["burst"])
+        self.breaker = breaker
+
+
+class Scraper:
+    """Fetches tweets for the configured users through the available backends.
+
+    Keep one instance around (as the daemon does) to reuse backend sessions
+    and in-memory breaker state. One-shot runs pick the breakers up from
+    the state file.
+    """
+
+    def __init__(self, config: Dict, backends: Optional[List[str]] = None, state: Optional[ScrapeState] = None):
+        self.config = config
+        self.state = state or ScrapeState.from_config(config)
+        self.mode = config["mode"]
+        self.slots: List[_Slot] = []
+        self.missing: List[str] = []
+
+        for name in backends or config["backendOrder"]:
+            backend_cls = BACKENDS.get(name)
+            if backend_cls is None:
+                print(f"Warning: unknown scraper backend {name!r}", file=sys.stderr)
+                continue
+            if not backend_cls.available:
+                self.missing.append(f"{name} not installed. Install with: {backend_cls.install_hint}")
+                continue
+            breaker = CircuitBreaker(config["breakerFailures"], config["breakerResetSeconds"])
+            breaker.load(self.state.breaker(name))
+            self.slots.append(_Slot(backend_cls(), backend_settings(config, name), breaker))
+
+        self._attempt_ids = itertools.count()
+        # Users in flight at once, and room for each of them to have every backend running
+        self.user_workers = max([s.settings["concurrency"] for s in self.slots] or [1])
+        self._attempts = ThreadPoolExecutor(max_workers=self.user_workers * max(1, len(self.slots)),
+                                            thread_name_prefix="scrape-attempt")
+
+    def _attempt(self, slot: _Slot, username: str, stream: Optional[_UserStream] = None) -> List[Dict]:
+        with slot.semaphore:
+            slot.bucket.acquire()
+            attempt = next(self._attempt_ids)
+            on_tweet = (lambda tweet: stream.offer(attempt, tweet)) if stream else None
+            collector = Collector(username, self.config, self.state.last_id(username), on_tweet)
+            started = time.time()
+            try:
+                slot.backend.fetch(username, collector)
+            except Exception:
+                slot.breaker.record(False)
+                if stream:
+                    stream.release(attempt)
+                raise
+            slot.breaker.record(True)
+            print(f"[{slot.name}] {username}: {len(collector.tweets)} tweets in {time.time() - started:.1f}s",
+                  file=sys.stderr)
+            return collector.tweets
+
+    def fetch_user(self, username: str, on_tweet: Optional[Callable[[Dict], None]] = None) -> Tuple[List[Dict], str]:
+        """Returns (new tweets, backend name) for one user, or raises ScrapeError.
+
+        `on_tweet` gets each new tweet as soon as it is parsed, before the
+        user is finished.
+        """
+        stream = _UserStream(on_tweet) if on_tweet else None
+        candidates = iter(self.slots)
+        pending = {}
+        errors = []
+
+        def launch() -> bool:
+            for slot in candidates:
+                if slot.breaker.allow():
+                    pending[self._attempts.submit(self._attempt, slot, username, stream)] = slot
+                    return True
+                errors.append(f"{slot.name}: circuit open")
+            return False
+
+        launch()
+        can_hedge = self.mode == "hedge"
+        while pending:
+            done, _ = wait(list(pending), timeout=self.config["hedgeAfterSeconds"] if can_hedge else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                can_hedge = launch()
+                if can_hedge:
+                    print(f"Hedging {username}: no answer after {self.config['hedgeAfterSeconds']}s", file=sys.stderr)
+                continue
+            for future in done:
+                slot = pending.pop(future)
+                try:
+                    tweets = future.result()
+                except Exception as e:
+                    print(f"Error fetching tweets for {username} from {slot.name}: {str(e)}", file=sys.stderr)
+                    errors.append(f"{slot.name}: {str(e)}")
+                    continue
+                if stream:
+                    stream.finish(tweets)
+                self.state.advance(username, tweets)
+                return tweets, slot.name
+            if not pending and self.mode != "single":
+                launch()
+
+        raise ScrapeError("; ".join(errors + self.missing) or "No scraper backend available")
+
+    def scrape_all(self, on_tweet: Optional[Callable[[Dict], None]] = None,
+                   on_user: Optional[Callable[[str, List[Dict], Optional[str], Optional[str]], None]] = None) -> Dict:
+        """Scrapes every target user; returns the {success, tweets, timestamp} result.
+
+        When streaming, `on_tweet(tweet)` gets tweets as they are parsed and
+        `on_user(username, tweets, backend, error)` is called as each user
+        finishes. The result then has per-user "counts" instead of "tweets",
+        so nothing accumulates for the length of the run.
+        """
+        users = self.config["targetUsers"]
+        if not self.slots:
+            return {
+                "success": False,
+                "error": "; ".join(self.missing) or "No scraper backend configured",
+                "tweets": {}
+            }
+
+        def run(username: str):
+            print(f"Scraping tweets for {username}...", file=sys.stderr)
+            try:
+                tweets, backend = self.fetch_user(username, on_tweet)
+                error = None
+                print(f"Found {len(tweets)} new tweets for {username} via {backend}", file=sys.stderr)
+            except ScrapeError as e:
+                tweets, backend, error = [], None, str(e)
+            if on_user:
+                on_user(username, tweets, backend, error)
+            return (len(tweets) if on_tweet else tweets), backend, error
+
+        results = []
+        if users:
+            with ThreadPoolExecutor(max_workers=min(self.user_workers, len(users))) as pool:
+                results = list(pool.map(run, users))
+
+        errors = {u: err for u, (_, _, err) in zip(users, results) if err}
+        if users and len(errors) == len(users):
+            return {"success": False, "error": "; ".join(f"{u}: {e}" for u, e in errors.items()), "tweets": {}}
+        return {
+            "success": True,
+            ("counts" if on_tweet else "tweets"): {u: tweets for u, (tweets, _, _) in zip(users, results)},
+            "backends": {u: backend for u, (_, backend, _) in zip(users, results) if backend},
+            "errors": errors,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    def save(self):
+        """Persists the high-water marks and breaker state; call once the tweets are handed off."""
+        for slot in self.slots:
+            self.state.set_breaker(slot.name, slot.breaker.to_dict())
+        self.state.save()
+
+    def health(self) -> Dict:
+        return {
+            slot.name: {"breaker": slot.breaker.state, "consecutiveFailures": slot.breaker.consecutive}
+            for slot in self.slots
+        }
@@ -0,0 +1,79 @@
+"""
+Tweet normalization and filtering shared by every backend.
+
+Backends turn whatever their library returns into the common dict shape
+with make_tweet() and hand the tweets, newest first, to a Collector. The
+Collector applies the retweet, reply and length filters and the per-user
+limit, and drops tweets at or below the user's high-water mark. It also
+tells the backend when to stop paging.
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+MIN_TEXT_LENGTH = 10
+# Raw tweets a backend may page through per emitted tweet before giving up on the user
+SCAN_FACTOR = 3
+
+
+def make_tweet(tweet_id, text: Optional[str], username: str, created_at=None, url: Optional[str] = None,
+               is_retweet: bool = False, is_reply: bool = False) -> Dict:
+    """Builds the {id, text, createdAt, username, url, isRetweet, isReply} dict the route ingests."""
+    text = (text or "").strip()
+    tweet_id = str(tweet_id)
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return {
+        "id": tweet_id,
+        "text": text,
+        "createdAt": created_at or datetime.utcnow().isoformat(),
+        "username": username,
+        "url": url or f"https://twitter.com/{username}/status/{tweet_id}",
+        "isRetweet": bool(is_retweet) or text.startswith("RT @"),
+        "isReply": bool(is_reply),
+    }
+
+
+def keep(tweet: Dict, config: Dict) -> bool:
+    """The retweet, reply and minimum-length filters from the config."""
+    if config["excludeRetweets"] and tweet["isRetweet"]:
+        return False
+    if config["excludeReplies"] and tweet["isReply"]:
+        return False
+    return len(tweet["text"]) >= MIN_TEXT_LENGTH
+
+
+class Collector:
+    """Receives one user's tweets from a backend, newest first, and decides when to stop.
+
+    `since_id` is the user's high-water mark. Timelines can lead with an
+    older pinned tweet, so paging stops at the second already-seen tweet
+    rather than the first. `on_tweet` is called with each tweet as soon
+    as it is accepted.
+    """
+
+    def __init__(self, username: str, config: Dict, since_id: Optional[int] = None,
+                 on_tweet: Optional[Callable[[Dict], None]] = None):
+        self.username = username
+        self.config = config
+        self.since_id = since_id
+        self.on_tweet = on_tweet
+        self.limit = config["maxTweetsPerUser"]
+        self.scan_limit = self.limit * SCAN_FACTOR
+        self.tweets: List[Dict] = []
+        self.scanned = 0
+        self._seen = 0
+        self._ids = set()
+
+    def add(self, tweet: Dict) -> bool:
+        """Offers one tweet; returns False once the backend should stop paging."""
+        self.scanned += 1
+        if self.since_id is not None and int(tweet["id"]) <= self.since_id:
+            self._seen += 1
+            return self._seen < 2 and self.scanned < self.scan_limit
+        if tweet["id"] not in self._ids and keep(tweet, self.config):
+            self._ids.add(tweet["id"])
+            self.tweets.append(tweet)
+            if self.on_tweet:
+                self.on_tweet(tweet)
+        return len(self.tweets) < self.limit and self.scanned < self.scan_limit
@@ -619,10 +619,19 @@ module.exports = async (req, res) => {
                 }
             }
 
+            // English captions published window by window while a long video is still transcribing.
+            // The progress in the query string makes the browser fetch each new version of the track.
+            const partialTrack = data.partialVttFile && !data.vttFiles
+                ? `${baseUrl}/${data.partialVttFile}?v=${data.progressSeconds || 0}`
+                : null;
+
             return res.status(200).json({
                 videoId: data.videoId,
                 status: data.captionStatus,
                 tracks: tracks,
+                partialTrack: partialTrack,
+                progressSeconds: data.progressSeconds || null,
+                durationSeconds: data.durationSeconds || null,
                 transcript: data.fullTranscript || null
             });
         } catch (error) {
@@ -37,6 +37,7 @@ const CourseEditor = ({ courseId, onBack }) => {
     const [activeTab, setActiveTab] = useState('settings'); // 'settings' | 'curriculum'
     const [captionLanguageSelection, setCaptionLanguageSelection] = useState(null); // { lessonId, videoUrl, captionVideoId }
     const [captionStatuses, setCaptionStatuses] = useState({}); // { videoId: status }
+    const [captionProgress, setCaptionProgress] = useState({}); // { videoId: { progressSeconds, durationSeconds } }
     const [toast, setToast] = useState(null); // { message, type: 'success'|'error' }
     const [batchTranscribing, setBatchTranscribing] = useState(null); // sectionId currently being batch transcribed
     const [batchProgress, setBatchProgress] = useState({ current: 0, total: 0, lessonTitle: '' });
@@ -108,6 +109,7 @@ const CourseEditor = ({ courseId, onBack }) => {
     // --- Logic ---
     const fetchCaptionStatuses = async (ids) => {
         const updates = {};
+        const progress = {};
         for (const id of ids) {
             if (!id) continue;
             try {
@@ -115,12 +117,14 @@ const CourseEditor = ({ courseId, onBack }) => {
                 if (res.ok) {
                     const data = await res.json();
                     updates[id] = data.status || 'unknown';
+                    progress[id] = { progressSeconds: data.progressSeconds, durationSeconds: data.durationSeconds };
                 }
             } catch (e) {
                 console.error("Failed to fetch caption status:", e);
             }
         }
         setCaptionStatuses(prev => ({ ...prev, ...updates }));
+        setCaptionProgress(prev => ({ ...prev, ...progress }));
     };
 
     // Poll for active caption jobs - faster polling (1.5s)
@@ -1219,6 +1223,12 @@ const CourseEditor = ({ courseId, onBack }) => {
                                                                                                                                     let label = 'Initializing...';
 
                                                                                                                                     if (status === 'processing') { pct = 25; label = 'Transcribing Audio...'; }
+                                                                                                                                    else if (status === 'transcribing') {
+                                                                                                                                        // Long videos report how far transcription has got, window by window
+                                                                                                                                        const { progressSeconds, durationSeconds } = captionProgress[lesson.captionVideoId] || {};
+                                                                                                                                        pct = durationSeconds ? 25 + Math.round(25 * Math.min(1, (progressSeconds || 0) / durationSeconds)) : 25;
+                                                                                                                                        label = 'Transcribing Audio (Preview Live)...';
+                                                                                                                                    }
                                                                                                                                     else if (status === 'cleaning') { pct = 50; label = 'Polishing with AI...'; }
                                                                                                                                     else if (status === 'translating') { pct = 75; label = 'Translating Languages...'; }
                                                                                                                                     else if (status === 'uploading') { pct = 90; label = 'Finalizing Upload...'; }
@@ -98,6 +98,10 @@ const VideoPlayer = ({ url, className, poster, captionVideoId, onToggleTheater,
                 const res = await fetch(`/api/captions?action=get&videoId=${captionVideoId}`);
                 if (res.ok) {
                     const data = await res.json();
+                    // While a long video is still transcribing, show the English captions finished so far
+                    if (data.partialTrack && Object.keys(data.tracks || {}).length === 0) {
+                        data.tracks = { en: data.partialTrack };
+                    }
                     setCaptions(data);
 
                     // If still processing, poll every 10 seconds
@@ -115,6 +119,15 @@ const VideoPlayer = ({ url, className, poster, captionVideoId, onToggleTheater,
         fetchCaptions();
     }, [captionVideoId]);
 
+    // A new partial or final track remounts its <track>, so re-apply the selected language
+    useEffect(() => {
+        if (!videoRef.current) return;
+        for (let i = 0; i < videoRef.current.textTracks.length; i++) {
+            videoRef.current.textTracks[i].mode =
+                (activeCaption !== 'off' && videoRef.current.textTracks[i].language === activeCaption) ? 'showing' : 'disabled';
+        }
+    }, [captions, activeCaption]);
+
     // Caption size CSS mapping
     const captionSizeMap = {
         small: '1.2rem',
@@ -482,7 +495,7 @@ const VideoPlayer = ({ url, className, poster, captionVideoId, onToggleTheater,
             >
                 {captions?.tracks && Object.entries(captions.tracks).map(([lang, src]) => (
                     <track
-                        key={lang}
+                        key={src}
                         label={getLangLabel(lang)}
                         kind="subtitles"
                         srcLang={lang}
@@ -891,7 +904,10 @@ const VideoPlayer = ({ url, className, poster, captionVideoId, onToggleTheater,
                             <Loader2 className="animate-spin text-[var(--yellow)]" size={16} />
                         </div>
                         <span className="text-[12px] font-black text-white uppercase tracking-[0.2em] leading-none">
-                            {captions.status === 'searching' ? 'Finding AI Captions' : 'Syncing AI Data'}
+                            {captions.status === 'searching' ? 'Finding AI Captions'
+                                : captions.status === 'transcribing' && captions.durationSeconds
+                                    ? `Transcribing ${Math.round(100 * (captions.progressSeconds || 0) / captions.durationSeconds)}%`
+                                    : 'Syncing AI Data'}
                         </span>
                     </motion.div>
                 )}
@@ -0,0 +1,88 @@
+"""ASGI front end for the caption worker.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+    python asgi.py
+
+Serves the same /process, /jobs/<videoId>, /healthz and /metrics contract
+as the Flask app in main.py. Requests are validated against schemas and
+/process requires the X-Worker-Secret header when CAPTION_WORKER_SECRET is
+set. Handlers only enqueue and read state, so a burst of requests from
+api/captions.js is answered immediately while transcription runs on the
+scheduler's slot threads.
+
+Run a single process per node: the model pool lives in this process, and
+scaling out is done with JOB_QUEUE=firestore across nodes.
+"""
+
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field, HttpUrl
+
+import main as worker
+import telemetry
+
+
+class ProcessRequest(BaseModel):
+    # Ends up in file names and R2 keys, so no slashes or leading dots
+    videoId: str = Field(min_length=1, max_length=128, pattern=r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+    videoUrl: HttpUrl
+    language: str = Field("en", max_length=16)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    worker.start_services()
+    yield
+    worker.status.flush()
+
+
+app = FastAPI(title="Caption worker", lifespan=lifespan)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError):
+    # Keep the Flask app's 400 {"error": ...} shape for callers
+    return JSONResponse(status_code=400, content={"error": "Invalid request", "details": exc.errors()})
+
+
+@app.post("/process")
+async def process_video(body: ProcessRequest, x_worker_secret: Optional[str] = Header(None)):
+    if not worker.worker_secret_ok(x_worker_secret):
+        return JSONResponse(status_code=401, content={"error": "Unauthorized"})
+    if worker.job_queue:
+        # Firestore transaction; keep it off the event loop
+        content, code, headers = await run_in_threadpool(worker.submit_job, body.videoId, str(body.videoUrl))
+    else:
+        content, code, headers = worker.submit_job(body.videoId, str(body.videoUrl))
+    return JSONResponse(status_code=code, content=content, headers=headers)
+
+
+@app.get("/jobs/{video_id}")
+async def job_status(video_id: str):
+    info = await run_in_threadpool(worker.job_status, video_id)
+    if not info:
+        return JSONResponse(status_code=404, content={"error": f"No job found for {video_id}"})
+    return info
+
+
+@app.get("/healthz")
+async def healthz():
+    return await run_in_threadpool(worker.health)
+
+
+@app.get("/metrics")
+async def metrics():
+    body, content_type = telemetry.render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 5000)), workers=1)
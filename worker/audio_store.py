@@ -0,0 +1,149 @@
+"""Decoded-audio store: 16 kHz float32 PCM written once to disk and memory-mapped back.
+
+ffmpeg's output is streamed straight into a file named by the sha256 of the
+PCM, so a decoded video never sits in a private array. Every reader, in this
+process or another, gets a read-only np.memmap, and slices of it (VAD
+regions, transcription windows) are views on the page cache rather than
+copies. A retried job or a second worker on the same host finds the file
+and skips the download and decode entirely.
+
+Files are removed once older than `max_age_seconds`, and least recently used
+files go first when the store is over `max_bytes`. A file removed while
+another process has it mapped stays readable until that mapping is closed.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+SUFFIX = ".f32"
+
+
+class StoreWriter:
+    """Streams PCM into a temp file, hashing as it goes; finish() publishes it under its hash."""
+
+    def __init__(self, store):
+        self.store = store
+        self.key = None
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, self._tmp_path = tempfile.mkstemp(dir=store.root, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def reset(self):
+        self._file.seek(0)
+        self._file.truncate()
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def finish(self):
+        self._file.close()
+        self.key = self._hash.hexdigest()
+        path = self.store.path(self.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic, so readers never see a partial file; identical audio just replaces itself
+        os.replace(self._tmp_path, path)
+        # Map before cleanup so an oversized file stays readable even if it's evicted at once
+        audio = self.store.get(self.key)
+        self.store.cleanup()
+        return audio
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class AudioStore:
+    """Content-addressed, memory-mapped store of decoded audio on local disk."""
+
+    def __init__(self, root, max_bytes, max_age_seconds=24 * 3600, cleanup_interval=60):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.cleanup_interval = cleanup_interval
+        self.hits = 0
+        self.misses = 0
+        self._last_cleanup = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key + SUFFIX)
+
+    def writer(self):
+        return StoreWriter(self)
+
+    def get(self, key):
+        """Returns a read-only memmap of the stored audio, or None."""
+        path = self.path(key)
+        try:
+            if os.path.getsize(path) == 0:
+                return None
+            # Marks it recently used for eviction
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return np.memmap(path, dtype=np.float32, mode="r")
+
+    def _files(self):
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, name, st.st_size, st.st_mtime
+
+    def cleanup(self, force=False):
+        """Drops expired files, then least recently used ones until under max_bytes."""
+        with self._lock:
+            if not force and time.time() - self._last_cleanup < self.cleanup_interval:
+                return
+            self._last_cleanup = time.time()
+
+        now = time.time()
+        live = []
+        removed = 0
+        for path, name, size, mtime in self._files():
+            # Leftover temp files (a writer died mid-decode) expire after an hour
+            expired = now - mtime > (self.max_age_seconds if name.endswith(SUFFIX) else 3600)
+            if expired:
+                removed += self._remove(path)
+            elif name.endswith(SUFFIX):
+                live.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in live)
+        for mtime, size, path in sorted(live):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+        if removed:
+            print(f"[audio] Removed {removed} decoded audio file(s), {total / 1e6:.0f} MB left")
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self):
+        files = [size for _, name, size, _ in self._files() if name.endswith(SUFFIX)]
+        return {"files": len(files), "bytes": sum(files), "maxBytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
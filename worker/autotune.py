@@ -0,0 +1,134 @@
+"""Picks the ASR model, precision and batch size for each job from the host and the backlog.
+
+The host is probed once at startup (cores, RAM, CPU instruction sets, CUDA).
+That fixes the device, the default compute type, CPU threads per model and
+the largest batch size that fits the hardware. Per job, `Autotuner.choose()`
+starts from the configured model and steps down the model ladder for short
+clips when the queue is backed up, so a burst of short uploads drains
+quickly instead of waiting behind large-v3. Stepped-down jobs on CUDA also
+drop to int8 weights. The batch size is cut to the number of 30s chunks the
+clip actually has, so short clips don't reserve memory for a batch they
+can't fill.
+"""
+
+import math
+import os
+import platform
+
+
+def _read_cpu_flags():
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                # "flags" on x86, "Features" on ARM
+                if line.startswith(("flags", "Features")):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def _total_memory_mb():
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def _probe_cuda():
+    """Returns (name, total memory MB) of the first CUDA device, or None."""
+    try:
+        import torch
+        if not torch.cuda.is_available():
+            return None
+        props = torch.cuda.get_device_properties(0)
+        return props.name, props.total_memory // (1024 * 1024)
+    except Exception:
+        return None
+
+
+def probe_host():
+    """Describes the hardware this worker is running on."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    flags = _read_cpu_flags()
+    isa = [name for name in ("avx2", "avx512f", "avx512_vnni", "avx_vnni", "fma", "asimd", "neon") if name in flags]
+
+    use_cuda = os.getenv("USE_CUDA")
+    cuda = _probe_cuda() if use_cuda != "false" else None
+    if use_cuda == "true" and cuda is None:
+        print("[autotune] USE_CUDA=true but no CUDA device was found, falling back to CPU")
+
+    return {
+        "machine": platform.machine(),
+        "cores": cores,
+        "memoryMb": _total_memory_mb(),
+        "isa": isa,
+        "cuda": {"name": cuda[0], "memoryMb": cuda[1]} if cuda else None,
+    }
+
+
+# Length of the audio chunks WhisperX transcribes as one batch item
+CHUNK_SECONDS = 30
+
+
+class Autotuner:
+    """Chooses a transcription profile per job.
+
+    `models` is the model ladder, best first; the first entry is the default.
+    Clips up to `short_seconds` step down one rung once `backlog` jobs are
+    queued, and another rung for every further `backlog` jobs. Jobs on the
+    default rung keep the host's compute type, so their transcripts match
+    the transcript cache key.
+    """
+
+    def __init__(self, host, models, slots=1, short_seconds=600, backlog=3, batch_size=None):
+        self.host = host
+        self.models = models
+        self.short_seconds = short_seconds
+        self.backlog = backlog
+
+        if host["cuda"]:
+            device = "cuda"
+            compute_type = "float16"
+            vram = host["cuda"]["memoryMb"]
+            default_batch = 32 if vram >= 20000 else 16 if vram >= 10000 else 8 if vram >= 6000 else 4
+            threads = 4
+        else:
+            device = "cpu"
+            # CTranslate2's int8 kernels need AVX2 (x86) or NEON (ARM) to beat float32
+            fast_int8 = {"avx2", "avx512f", "asimd", "neon"} & set(host["isa"])
+            compute_type = "int8" if fast_int8 else "float32"
+            threads = max(1, host["cores"] // max(slots, 1))
+            default_batch = 8 if threads >= 8 else 4
+            memory = host["memoryMb"]
+            if memory is not None and memory < 8000:
+                default_batch = 2
+
+        self.base = {
+            "model": models[0],
+            "device": device,
+            "computeType": compute_type,
+            "threads": threads,
+            "batchSize": batch_size or default_batch,
+        }
+
+    def choose(self, audio_seconds, queued=0):
+        """Returns the profile dict for a job of `audio_seconds` with `queued` jobs waiting."""
+        rung = 0
+        if audio_seconds <= self.short_seconds and self.backlog > 0:
+            rung = min(queued // self.backlog, len(self.models) - 1)
+        profile = dict(self.base, model=self.models[rung])
+        # WhisperX batches 30s chunks; a batch bigger than the clip only holds memory
+        profile["batchSize"] = max(1, min(self.base["batchSize"], math.ceil(audio_seconds / CHUNK_SECONDS)))
+        if rung:
+            if profile["device"] == "cuda":
+                profile["computeType"] = "int8_float16"
+            profile["reason"] = f"{queued} queued, {audio_seconds:.0f}s clip"
+        return profile
@@ -0,0 +1,253 @@
+"""Bulk caption backfill: python main.py backfill --input videos.jsonl
+
+Captions a whole catalog in one run on the shared model pool. Sources are
+downloaded and decoded a few at a time ahead of the transcriber, short videos
+are packed together into a single model.transcribe batch, and cleanup,
+translation and upload run on a separate pool so the transcriber never waits
+on the network. Finished videos are appended to a checkpoint file so an
+interrupted run picks up where it left off.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ingest import SAMPLE_RATE
+
+
+def load_jobs_from_jsonl(path):
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if not record.get("videoId") or not record.get("videoUrl"):
+                print(f"[backfill] Skipping line {line_no}: missing videoId or videoUrl")
+                continue
+            jobs.append({"videoId": record["videoId"], "videoUrl": record["videoUrl"]})
+    return jobs
+
+
+def r2_public_url(key):
+    """Public URL of an R2 object, built the same way as the upload action in api/captions.js."""
+    bucket = os.getenv("R2_BUCKET_NAME", "fp2p-content")
+    domain = os.getenv("R2_PUBLIC_DOMAIN") or f"{os.getenv('R2_ACCOUNT_ID')}.r2.cloudflarestorage.com/{bucket}"
+    return f"{domain}/{key}" if domain.startswith("http") else f"https://{domain}/{key}"
+
+
+def load_jobs_from_firestore(db, caption_status, limit=None):
+    query = db.collection("videoCaptions").where("captionStatus", "==", caption_status)
+    if limit:
+        query = query.limit(limit)
+    jobs = []
+    for doc in query.stream():
+        data = doc.to_dict()
+        video_id = data.get("videoId") or doc.id
+        # Uploaded videos ('pending' docs) only carry the R2 key of the source
+        video_url = data.get("videoUrl") or (r2_public_url(data["r2Key"]) if data.get("r2Key") else None)
+        if not video_url:
+            print(f"[backfill] Skipping {video_id}: no videoUrl or r2Key")
+            continue
+        jobs.append({"videoId": video_id, "videoUrl": video_url})
+    return jobs
+
+
+class Checkpoint:
+    """Append-only JSONL record of finished videos."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        if record.get("outcome") == "ready":
+                            self.done.add(record["videoId"])
+
+    def record(self, video_id, outcome, audio_seconds):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "videoId": video_id,
+                    "outcome": outcome,
+                    "audioSeconds": round(audio_seconds, 1),
+                    "at": time.time(),
+                }) + "\n")
+            if outcome == "ready":
+                self.done.add(video_id)
+
+
+class Stats:
+    def __init__(self):
+        self.started = time.time()
+        self.ready = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, outcome, audio_seconds):
+        with self._lock:
+            if outcome == "ready":
+                self.ready += 1
+                self.audio_seconds += audio_seconds
+            else:
+                self.failed += 1
+
+    def summary(self):
+        wall = max(time.time() - self.started, 1e-6)
+        return {
+            "videos": self.ready,
+            "failed": self.failed,
+            "wallSeconds": round(wall, 1),
+            "audioHours": round(self.audio_seconds / 3600, 2),
+            "videosPerHour": round(self.ready * 3600 / wall, 1),
+            "audioHoursPerWallHour": round(self.audio_seconds / wall, 2),
+        }
+
+
+def main(argv, worker):
+    """Runs a backfill; `worker` is the caption worker's main module."""
+    parser = argparse.ArgumentParser(prog="main.py backfill", description="Caption a catalog of videos in one run.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL file with one {videoId, videoUrl} per line")
+    source.add_argument("--firestore-status", help="Caption every videoCaptions doc with this captionStatus")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--checkpoint", default="backfill_checkpoint.jsonl")
+    parser.add_argument("--batch-seconds", type=float, default=900,
+                        help="Max audio seconds packed into one transcribe call")
+    parser.add_argument("--short-seconds", type=float, default=240,
+                        help="Videos up to this long are eligible for batching")
+    parser.add_argument("--prefetch", type=int, default=4, help="Videos downloaded/decoded ahead of the transcriber")
+    parser.add_argument("--finish-workers", type=int, default=4, help="Concurrent cleanup/translate/upload jobs")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        jobs = load_jobs_from_jsonl(args.input)
+    else:
+        if worker.db is None:
+            print("[backfill] Firestore is not initialized")
+            return 1
+        jobs = load_jobs_from_firestore(worker.db, args.firestore_status, args.limit)
+    if args.limit:
+        jobs = jobs[:args.limit]
+
+    checkpoint = Checkpoint(args.checkpoint)
+    jobs = [job for job in jobs if job["videoId"] not in checkpoint.done]
+    print(f"[backfill] {len(jobs)} videos to caption ({len(checkpoint.done)} already done per {args.checkpoint})")
+    if not jobs:
+        return 0
+
+    worker.warm_up_models()
+    stats = Stats()
+    finish_pool = ThreadPoolExecutor(max_workers=args.finish_workers)
+
+    def finish(video_id, cues, audio_seconds):
+        try:
+            worker.finish_captions(video_id, cues)
+            outcome = "ready"
+        except Exception as e:
+            worker.report_failure(video_id, e)
+            outcome = "error"
+        checkpoint.record(video_id, outcome, audio_seconds)
+        stats.add(outcome, audio_seconds)
+
+    def prepare(job):
+        """Runs on the prefetch pool: returns (job, cues, audio, audio seconds, transcript_key, fingerprint)."""
+        video_id = job["videoId"]
+        worker.set_stage(video_id, 'starting')
+        cues, fingerprint = worker.lookup_transcript(job["videoUrl"])
+        if cues is not None:
+            # Older cache entries have no duration; the last cue end is the closest stand-in
+            audio_seconds = worker.cached_audio_seconds(fingerprint) or max((c["end"] for c in cues), default=0.0)
+            return job, cues, None, audio_seconds, None, fingerprint
+        audio, transcript_key, cues = worker.ingest_audio(video_id, job["videoUrl"], fingerprint)
+        return job, cues, audio, len(audio) / SAMPLE_RATE, transcript_key, fingerprint
+
+    batch = []
+    batch_seconds = 0.0
+
+    def flush_batch():
+        nonlocal batch, batch_seconds
+        if not batch:
+            return
+        items = [(job["videoId"], audio) for job, audio, _, _ in batch]
+        try:
+            results = worker.transcribe_batch(items)
+        except Exception as e:
+            for job, audio, _, _ in batch:
+                worker.report_failure(job["videoId"], e)
+                checkpoint.record(job["videoId"], "error", len(audio) / SAMPLE_RATE)
+                stats.add("error", 0)
+        else:
+            for job, audio, transcript_key, fingerprint in batch:
+                cues = results[job["videoId"]]
+                worker.store_transcript(transcript_key, fingerprint, cues, len(audio) / SAMPLE_RATE)
+                finish_pool.submit(finish, job["videoId"], cues, len(audio) / SAMPLE_RATE)
+        batch = []
+        batch_seconds = 0.0
+
+    with ThreadPoolExecutor(max_workers=args.prefetch) as prefetch_pool:
+        pending = deque()
+        remaining = iter(jobs)
+        for job in remaining:
+            pending.append((job, prefetch_pool.submit(prepare, job)))
+            if len(pending) >= args.prefetch:
+                break
+
+        while pending:
+            job, future = pending.popleft()
+            next_job = next(remaining, None)
+            if next_job is not None:
+                pending.append((next_job, prefetch_pool.submit(prepare, next_job)))
+
+            try:
+                job, cues, audio, audio_seconds, transcript_key, fingerprint = future.result()
+            except Exception as e:
+                worker.report_failure(job["videoId"], e)
+                checkpoint.record(job["videoId"], "error", 0)
+                stats.add("error", 0)
+                continue
+
+            if cues is not None:
+                finish_pool.submit(finish, job["videoId"], cues, audio_seconds)
+                continue
+
+            if audio_seconds > args.short_seconds:
+                profile = worker.choose_profile(audio_seconds)
+                try:
+                    cues = worker.transcribe_audio(job["videoId"], audio, profile=profile)
+                except Exception as e:
+                    worker.report_failure(job["videoId"], e)
+                    checkpoint.record(job["videoId"], "error", audio_seconds)
+                    stats.add("error", 0)
+                    continue
+                # As in stage_transcribe, only the default model's output is cached under the default key
+                if worker.transcript_settings(profile) == worker.transcript_settings():
+                    worker.store_transcript(transcript_key, fingerprint, cues, audio_seconds)
+                finish_pool.submit(finish, job["videoId"], cues, audio_seconds)
+                continue
+
+            if batch_seconds + audio_seconds > args.batch_seconds:
+                flush_batch()
+            batch.append((job, audio, transcript_key, fingerprint))
+            batch_seconds += audio_seconds
+        flush_batch()
+
+    finish_pool.shutdown(wait=True)
+    worker.status.flush()
+
+    summary = stats.summary()
+    print(f"[backfill] Done: {summary['videos']} videos ({summary['failed']} failed) in {summary['wallSeconds']}s")
+    print(f"[backfill] Throughput: {summary['videosPerHour']} videos/hour, "
+          f"{summary['audioHoursPerWallHour']} audio-hours per wall-hour")
+    print(json.dumps(summary))
+    return 0 if summary["failed"] == 0 else 2
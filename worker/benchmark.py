@@ -0,0 +1,352 @@
+"""End-to-end benchmark for the caption worker.
+
+    python benchmark.py --minutes 10 --runs 3
+    python benchmark.py --minutes 60 --asr fake --llm-latency 2.0
+
+Runs process_task against synthetic audio served from a local HTTP server,
+with local stand-ins for every external service:
+
+- OpenAI: a stub chat-completions endpoint on the same server that echoes
+  the cues back after --llm-latency seconds
+- R2: moto's S3 server if moto is installed, otherwise an in-memory fake
+- Firestore: an in-memory fake that applies merges like the real thing
+
+Per-stage latency comes from the stageTimings the worker writes to its
+videoCaptions document. Results (per-stage seconds, peak RSS, real-time
+factor) are written as JSON under bench_results/ tagged with the current
+git commit, so runs can be diffed across commits.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def synth_speechlike(seconds, seed=0):
+    """Voiced bursts with syllable-rate modulation and pauses, so VAD and ASR have work to do."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    # Talk for a few seconds, pause for one or two
+    phrase = (np.sin(2 * np.pi * t / 7.0) > -0.4).astype(np.float32)
+    audio = 0.3 * voiced * syllables * phrase + 0.005 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+def load_sample(path, seconds):
+    """Decodes a real speech sample and tiles it out to the requested length."""
+    out = subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", path, "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        check=True, capture_output=True,
+    ).stdout
+    sample = np.frombuffer(out, dtype=np.float32)
+    reps = math.ceil(seconds * SAMPLE_RATE / len(sample))
+    return np.tile(sample, reps)[:int(seconds * SAMPLE_RATE)]
+
+
+def to_wav(audio):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+class StubServer:
+    """Serves the synthetic media file and a fake OpenAI chat-completions API."""
+
+    def __init__(self, media, llm_latency):
+        self.media = media
+        self.llm_latency = llm_latency
+        self.llm_requests = 0
+        self.llm_prompt_chars = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _media_headers(self):
+                self.send_header("Content-Type", "audio/wav")
+                self.send_header("Content-Length", str(len(stub.media)))
+                self.send_header("ETag", f'"{hash(stub.media)}"')
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self._media_headers()
+                self.end_headers()
+
+            def do_GET(self):
+                self.send_response(200)
+                self._media_headers()
+                self.end_headers()
+                self.wfile.write(stub.media)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][-1]["content"]
+                stub.llm_requests += 1
+                stub.llm_prompt_chars += len(prompt)
+                time.sleep(stub.llm_latency)
+                # Echo the cues back unchanged: always passes validation
+                content = prompt.split("VTT CONTENT:", 1)[-1].strip()
+                payload = json.dumps({
+                    "id": f"stub-{stub.llm_requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                              "total_tokens": (len(prompt) + len(content)) // 4},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+
+class FakeDocument:
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+
+    def set(self, data, merge=False):
+        from status import deep_merge
+        with self.store.lock:
+            if merge:
+                deep_merge(self.store.docs.setdefault(self.key, {}), data)
+            else:
+                self.store.docs[self.key] = dict(data)
+
+    def update(self, data):
+        self.set(data, merge=True)
+
+
+class FakeCollection:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def document(self, doc_id):
+        return FakeDocument(self.store, (self.name, doc_id))
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append((ref, data, merge))
+
+    def commit(self):
+        self.store.commits += 1
+        for ref, data, merge in self.ops:
+            ref.set(data, merge=merge)
+
+
+class FakeFirestore:
+    """Just enough of the Firestore client for the worker's status writes."""
+
+    def __init__(self):
+        self.docs = {}
+        self.commits = 0
+        self.lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+class FakeS3:
+    """In-memory stand-in used when moto isn't installed."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = 0
+
+    def head_object(self, Bucket, Key):
+        from botocore.exceptions import ClientError
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        return self.objects[(Bucket, Key)]["head"]
+
+    def upload_fileobj(self, fileobj, Bucket, Key, ExtraArgs=None, Config=None):
+        extra = ExtraArgs or {}
+        self.uploads += 1
+        self.objects[(Bucket, Key)] = {
+            "body": fileobj.read(),
+            "head": {"Metadata": extra.get("Metadata", {}), "ContentEncoding": extra.get("ContentEncoding")},
+        }
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.uploads += 1
+        self.objects[(Bucket, Key)] = {"body": Body, "head": {"Metadata": kwargs.get("Metadata", {})}}
+
+
+def start_moto():
+    """Starts moto's S3 server if available; returns its endpoint or None."""
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        return None
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}"
+
+
+def fake_transcribe(video_id, audio, on_window=None, profile=None):
+    """Cue every three seconds of audio; skips the model for LLM/upload-focused runs."""
+    words = "so basically you want to take the high ground here and then piece control the box".split()
+    cues = []
+    for i, start in enumerate(np.arange(0, len(audio) / SAMPLE_RATE - 3, 3.0)):
+        text = " ".join(words[(i + j) % len(words)] for j in range(10))
+        cues.append({"start": float(start), "end": float(start) + 2.8, "text": text})
+    return cues
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(own / scale, 1), round(children / scale, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=5, help="Length of the synthetic audio")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--speech-sample", help="Real speech file to tile instead of synthetic tones")
+    parser.add_argument("--asr", choices=["whisperx", "fake"], default="whisperx")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds the OpenAI stub waits per call")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the content cache between runs")
+    parser.add_argument("--output", default="bench_results")
+    args = parser.parse_args()
+
+    seconds = args.minutes * 60
+    commit = git_commit()
+    audio = load_sample(args.speech_sample, seconds) if args.speech_sample else synth_speechlike(seconds)
+    stub = StubServer(to_wav(audio), args.llm_latency)
+
+    workdir = tempfile.mkdtemp(prefix="caption-bench-")
+    moto_endpoint = start_moto()
+    # Configure the worker before importing it; it reads settings at import time
+    os.environ.update({
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{stub.url}/v1",
+        "CACHE_PATH": os.path.join(workdir, "cache.sqlite3"),
+        "R2_ENDPOINT": moto_endpoint or "http://127.0.0.1:9",
+        "R2_ACCESS_KEY": "bench",
+        "R2_SECRET_KEY": "bench",
+        "STATUS_FLUSH_INTERVAL": "0.2",
+    })
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main as worker
+
+    worker.db = FakeFirestore()
+    if moto_endpoint:
+        worker.s3.create_bucket(Bucket=worker.S3_BUCKET)
+    else:
+        worker.s3 = FakeS3()
+    if args.asr == "fake":
+        worker.transcribe_audio = fake_transcribe
+    else:
+        started = time.time()
+        worker.warm_up_models()
+        print(f"[bench] Model warm-up took {time.time() - started:.1f}s")
+    worker.status.start()
+
+    runs = []
+    for i in range(args.runs):
+        if not args.warm_cache:
+            worker.cache = worker.ContentCache(os.path.join(workdir, f"cache-{i}.sqlite3"), worker.cache.max_bytes)
+        video_id = f"bench-{i}"
+        llm_before = stub.llm_requests
+        started = time.time()
+        worker.process_task(video_id, f"{stub.url}/media/{video_id}.wav")
+        wall = time.time() - started
+        worker.status.flush()
+
+        doc = worker.db.docs.get(("videoCaptions", video_id), {})
+        stages = doc.get("stageTimings", {})
+        run = {
+            "run": i,
+            "wallSeconds": round(wall, 3),
+            "realTimeFactor": round(wall / seconds, 4),
+            "stages": stages,
+            "transcribeRealTimeFactor": round(stages.get("transcribing", 0) / seconds, 4),
+            "llmRequests": stub.llm_requests - llm_before,
+            "captionStatus": doc.get("captionStatus"),
+            "cache": worker.cache.stats(),
+        }
+        runs.append(run)
+        print(f"[bench] run {i}: {wall:.1f}s wall, RTF {run['realTimeFactor']}, stages {json.dumps(stages)}")
+
+    own_rss, child_rss = peak_rss_mb()
+    result = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "audioSeconds": seconds,
+        "audioSource": args.speech_sample or "synthetic",
+        "asr": args.asr,
+        "asrModel": worker.ASR_MODEL if args.asr == "whisperx" else None,
+        "device": worker.DEVICE,
+        "computeType": worker.COMPUTE_TYPE,
+        "llmLatency": args.llm_latency,
+        "r2": "moto" if moto_endpoint else "in-memory",
+        "peakRssMb": own_rss,
+        "peakChildRssMb": child_rss,
+        "firestoreCommits": worker.db.commits,
+        "runs": runs,
+    }
+
+    out_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), args.output)
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, f"{result['timestamp'].replace(':', '')}_{result['commit']}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"[bench] Peak RSS {own_rss} MB (children {child_rss} MB); results written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def content_hash(*parts):
+    """Stable sha256 over strings, bytes and JSON-serializable values."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            # Flat byte view so large audio buffers are hashed without a copy
+            data = memoryview(part).cast("B")
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True).encode("utf-8")
+        # Length prefix so ("ab", "c") and ("a", "bc") don't collide
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ContentCache:
+    """Persistent content-addressed cache backed by a single SQLite file.
+
+    Values are JSON documents stored under (namespace, key). When the total
+    stored size exceeds `max_bytes`, the least recently accessed entries are
+    evicted. Safe to share between threads; each process opens its own
+    connection and SQLite handles locking between processes.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+
+    def get(self, namespace, key):
+        """Returns the cached value or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?", (time.time(), namespace, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, namespace, key, value):
+        data = json.dumps(value).encode("utf-8")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, data, len(data), now, now),
+            )
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we're back under budget
+        rows = self._conn.execute("SELECT namespace, key, size FROM entries ORDER BY accessed ASC").fetchall()
+        doomed = []
+        for namespace, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((namespace, key))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+        self._conn.commit()
+        print(f"[cache] Evicted {len(doomed)} entries")
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": size, "maxBytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,198 @@
+"""Caption cues, WebVTT/SRT serializers and a strict parser.
+
+Uses only the standard library.
+
+Cues travel through the pipeline as {start, end, text} dicts; `CueList` is
+the compact form used for serializing and parsing. Times are held as
+integer milliseconds in `array` columns and all cue text in a single string
+with offsets, so a long transcript is a handful of objects rather than
+thousands of dicts.
+"""
+
+import re
+from array import array
+
+
+class CaptionFormatError(ValueError):
+    """Raised when caption text is malformed or doesn't match the cues it should."""
+
+
+class CueList:
+    """Column-oriented cues: start/end milliseconds plus text offsets into one string."""
+
+    __slots__ = ("starts", "ends", "_offsets", "_text")
+
+    def __init__(self, starts, ends, texts):
+        self.starts = array("q", starts)
+        self.ends = array("q", ends)
+        self._offsets = array("q", [0])
+        pos = 0
+        for text in texts:
+            pos += len(text)
+            self._offsets.append(pos)
+        self._text = "".join(texts)
+
+    @classmethod
+    def from_dicts(cls, cues, skip_empty=True):
+        """Builds a CueList from {start, end, text} dicts (seconds), stripping text."""
+        starts, ends, texts = [], [], []
+        for cue in cues:
+            text = cue["text"].strip()
+            if skip_empty and not text:
+                continue
+            starts.append(int(round(cue["start"] * 1000)))
+            ends.append(int(round(cue["end"] * 1000)))
+            texts.append(text)
+        return cls(starts, ends, texts)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text(self, i):
+        return self._text[self._offsets[i]:self._offsets[i + 1]]
+
+    def texts(self):
+        offsets = self._offsets
+        return [self._text[offsets[i]:offsets[i + 1]] for i in range(len(self.starts))]
+
+    def to_dicts(self):
+        return [
+            {"start": start / 1000, "end": end / 1000, "text": text}
+            for start, end, text in zip(self.starts, self.ends, self.texts())
+        ]
+
+
+def _as_cue_list(cues):
+    return cues if isinstance(cues, CueList) else CueList.from_dicts(cues)
+
+
+def format_timestamps(millis, separator="."):
+    """Formats a sequence of integer milliseconds as HH:MM:SS.mmm in one pass."""
+    template = "%02d:%02d:%02d" + separator + "%03d"
+    out = []
+    for ms in millis:
+        seconds, ms = divmod(ms, 1000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        out.append(template % (hours, minutes, seconds, ms))
+    return out
+
+
+def format_vtt_time(seconds):
+    """Formats seconds into WEBVTT timestamp: HH:MM:SS.mmm"""
+    return format_timestamps((int(round(seconds * 1000)),))[0]
+
+
+def _render_blocks(cue_list, separator, first_number):
+    starts = format_timestamps(cue_list.starts, separator)
+    ends = format_timestamps(cue_list.ends, separator)
+    return "\n\n".join(
+        f"{first_number + i}\n{start} --> {end}\n{text}"
+        for i, (start, end, text) in enumerate(zip(starts, ends, cue_list.texts()))
+    )
+
+
+def render_cue_blocks(cues, first_number=1):
+    """Renders numbered WebVTT blocks without the WEBVTT header (as sent to the LLM)."""
+    return _render_blocks(_as_cue_list(cues), ".", first_number)
+
+
+def render_vtt(cues):
+    """Renders cues (dicts or a CueList) as a WEBVTT document string."""
+    cue_list = _as_cue_list(cues)
+    if not len(cue_list):
+        return "WEBVTT\n\n"
+    return "WEBVTT\n\n" + _render_blocks(cue_list, ".", 1) + "\n\n"
+
+
+def render_srt(cues):
+    """Renders cues (dicts or a CueList) as a SubRip document string."""
+    cue_list = _as_cue_list(cues)
+    if not len(cue_list):
+        return ""
+    return _render_blocks(cue_list, ",", 1) + "\n\n"
+
+
+def generate_vtt(segments, output_path):
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(render_vtt(segments))
+
+
+def generate_srt(segments, output_path):
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(render_srt(segments))
+
+
+TIMING_RE = re.compile(
+    r"^(?:(\d+):)?([0-5]\d):([0-5]\d)[.,](\d{3})\s+-->\s+(?:(\d+):)?([0-5]\d):([0-5]\d)[.,](\d{3})(?:\s+\S.*)?$"
+)
+BLOCK_SPLIT_RE = re.compile(r"\n[ \t]*\n")
+
+
+def _millis(hours, minutes, seconds, ms):
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(ms)
+
+
+def parse_cue_blocks(content):
+    """Strictly parses WebVTT/SRT cue blocks (no header required) into a CueList.
+
+    Every block must have a timing line, either first or after a single
+    identifier line, followed by at least one line of text, and must not end
+    before it starts. Anything else raises CaptionFormatError.
+    """
+    starts, ends, texts = [], [], []
+    content = content.replace("\r\n", "\n").strip()
+    if not content:
+        return CueList(starts, ends, texts)
+    for n, block in enumerate(BLOCK_SPLIT_RE.split(content), 1):
+        lines = block.strip("\n").split("\n")
+        if lines[0].startswith("NOTE") or lines[0].startswith("STYLE"):
+            continue
+        timing = TIMING_RE.match(lines[0].strip())
+        body = lines[1:]
+        if timing is None and len(lines) > 1:
+            timing = TIMING_RE.match(lines[1].strip())
+            body = lines[2:]
+        if timing is None:
+            raise CaptionFormatError(f"block {n} has no valid timing line: {lines[0][:80]!r}")
+        text = "\n".join(line.strip() for line in body if line.strip())
+        if not text:
+            raise CaptionFormatError(f"block {n} has no text")
+        start = _millis(*timing.group(1, 2, 3, 4))
+        end = _millis(*timing.group(5, 6, 7, 8))
+        if end < start:
+            raise CaptionFormatError(f"block {n} ends before it starts")
+        starts.append(start)
+        ends.append(end)
+        texts.append(text)
+    return CueList(starts, ends, texts)
+
+
+def parse_vtt(content):
+    """Strictly parses a full WEBVTT document into a CueList."""
+    content = content.lstrip("\ufeff")
+    if not content.startswith("WEBVTT"):
+        raise CaptionFormatError("missing WEBVTT header")
+    header, _, body = content.replace("\r\n", "\n").partition("\n\n")
+    if "-->" in header:
+        raise CaptionFormatError("cue in WEBVTT header block")
+    return parse_cue_blocks(body)
+
+
+def parse_srt(content):
+    """Strictly parses a SubRip document into a CueList."""
+    return parse_cue_blocks(content.lstrip("\ufeff"))
+
+
+def match_cues(source, parsed):
+    """Checks `parsed` has the same cues and timestamps as `source`; returns the parsed texts."""
+    if not isinstance(source, CueList):
+        source = CueList.from_dicts(source, skip_empty=False)
+    if len(parsed) != len(source):
+        raise CaptionFormatError(f"expected {len(source)} cues, got {len(parsed)}")
+    if parsed.starts != source.starts or parsed.ends != source.ends:
+        for i in range(len(source)):
+            if parsed.starts[i] != source.starts[i] or parsed.ends[i] != source.ends[i]:
+                start, end = format_timestamps((parsed.starts[i], parsed.ends[i]))
+                raise CaptionFormatError(f"timestamp mismatch at {start} --> {end}")
+    return parsed.texts()
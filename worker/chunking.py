@@ -0,0 +1,147 @@
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import content_hash
+from captions import match_cues, parse_cue_blocks, render_cue_blocks
+
+# Token budget for the cues of one window (context cues are extra)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 1500))
+# Cues shown before and after each window as read-only context
+CHUNK_OVERLAP_CUES = int(os.getenv("CHUNK_OVERLAP_CUES", 2))
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", 4))
+CHUNK_MAX_ATTEMPTS = int(os.getenv("CHUNK_MAX_ATTEMPTS", 3))
+
+# Index line plus "HH:MM:SS.mmm --> HH:MM:SS.mmm" costs roughly this many tokens
+CUE_OVERHEAD_TOKENS = 14
+
+
+class ChunkValidationError(Exception):
+    """Raised when an LLM response doesn't line up with the cues it was given."""
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _is_anchor(text):
+    """Content-defined break point: true for roughly one cue in four."""
+    return zlib.crc32(text.strip().lower().encode("utf-8")) % 4 == 0
+
+
+def plan_windows(cues, max_tokens=CHUNK_MAX_TOKENS):
+    """Splits cues into (start, end) index ranges that fit the token budget.
+
+    Windows always break on cue boundaries; a single cue larger than the
+    budget gets a window of its own. Once a window is half full it also ends
+    after an "anchor" cue chosen from its text, so an edit early in a video
+    only shifts the windows around it and later windows still hit the cache.
+    """
+    windows = []
+    start = 0
+    used = 0
+    for i, cue in enumerate(cues):
+        cost = estimate_tokens(cue["text"]) + CUE_OVERHEAD_TOKENS
+        if i > start and used + cost > max_tokens:
+            windows.append((start, i))
+            start = i
+            used = 0
+        used += cost
+        if used >= max_tokens // 2 and _is_anchor(cue["text"]):
+            windows.append((start, i + 1))
+            start = i + 1
+            used = 0
+    if start < len(cues):
+        windows.append((start, len(cues)))
+    return windows
+
+
+def render_cues(cues, first_number=1):
+    """Renders cues as numbered WebVTT blocks (without the WEBVTT header)."""
+    return render_cue_blocks(cues, first_number)
+
+
+def validate_window(source, content):
+    """Strictly parses a response and checks it has the source's cues and timestamps; returns the texts."""
+    content = content.strip()
+    # Models sometimes wrap the blocks in a code fence or add a header; neither is a cue
+    if content.startswith("```"):
+        content = content.strip("`").partition("\n")[2]
+    if content.startswith("WEBVTT"):
+        content = content.partition("\n\n")[2]
+    texts = match_cues(source, parse_cue_blocks(content))
+    return [text.strip() for text in texts]
+
+
+def _run_window(cues, window, build_prompt, complete, tag, overlap, cache, cache_scope):
+    start, end = window
+    before = cues[max(0, start - overlap):start]
+    after = cues[end:end + overlap]
+    prompt = build_prompt(
+        render_cues(cues[start:end], start + 1),
+        render_cues(before, max(0, start - overlap) + 1) if before else "",
+        render_cues(after, end + 1) if after else "",
+    )
+
+    key = None
+    if cache is not None:
+        # Keyed on cue text only, so cues that merely moved in time still hit
+        key = content_hash(
+            *cache_scope,
+            [cue["text"].strip() for cue in cues[start:end]],
+            [cue["text"].strip() for cue in before],
+            [cue["text"].strip() for cue in after],
+        )
+        cached = cache.get("llm", key)
+        if cached is not None and len(cached) == end - start:
+            return cached, None
+
+    last_error = None
+    for attempt in range(1, CHUNK_MAX_ATTEMPTS + 1):
+        try:
+            texts = validate_window(cues[start:end], complete(prompt))
+            if key is not None:
+                cache.put("llm", key, texts)
+            return texts, None
+        except Exception as e:
+            last_error = e
+            print(f"{tag} cues {start + 1}-{end} attempt {attempt}/{CHUNK_MAX_ATTEMPTS} failed: {e}")
+    return None, last_error
+
+
+def process_cues(cues, build_prompt, complete, tag="", max_tokens=CHUNK_MAX_TOKENS,
+                 overlap=CHUNK_OVERLAP_CUES, concurrency=CHUNK_CONCURRENCY, cache=None, cache_scope=()):
+    """Runs an LLM rewrite over cues in token-budgeted windows and reassembles the result.
+
+    `build_prompt(window_vtt, before_vtt, after_vtt)` returns the prompt for one
+    window and `complete(prompt)` returns the model's text. Windows run in
+    parallel and are validated independently; only failing windows are retried,
+    and a window that still fails keeps its source text.
+
+    With a `cache`, validated windows are stored under a hash of `cache_scope`
+    (task, prompt version, language, model) and the window and context text,
+    so unchanged windows of a re-submitted or lightly edited video skip the
+    LLM entirely.
+
+    Returns (cues, failed_window_count).
+    """
+    windows = plan_windows(cues, max_tokens)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda w: _run_window(cues, w, build_prompt, complete, tag, overlap, cache, cache_scope),
+            windows,
+        ))
+
+    output = []
+    failed = 0
+    for (start, end), (texts, error) in zip(windows, results):
+        if texts is None:
+            failed += 1
+            texts = [cue["text"].strip() for cue in cues[start:end]]
+        for cue, text in zip(cues[start:end], texts):
+            output.append({"start": cue["start"], "end": cue["end"], "text": text})
+
+    if len(output) != len(cues):
+        raise ChunkValidationError(f"reassembled {len(output)} cues from {len(cues)}")
+    return output, failed
@@ -0,0 +1,154 @@
+import subprocess
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# float32 mono
+BYTES_PER_SECOND = SAMPLE_RATE * 4
+
+
+class IngestError(Exception):
+    """Raised when the source can't be fetched or decoded."""
+
+
+def _ffmpeg_cmd(source):
+    return [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-i", source,
+        "-vn", "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "pipe:1",
+    ]
+
+
+def _feed(response, proc, state, chunk_size):
+    """Copies the HTTP body into ffmpeg's stdin, counting bytes as it goes."""
+    try:
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            proc.stdin.write(chunk)
+            state["bytes"] += len(chunk)
+    except (BrokenPipeError, ValueError):
+        # ffmpeg bailed out; its exit code tells the caller why
+        pass
+    except Exception as e:
+        state["error"] = e
+    finally:
+        try:
+            proc.stdin.close()
+        except Exception:
+            pass
+
+
+class _MemorySink:
+    def __init__(self):
+        self.pcm = bytearray()
+
+    @property
+    def size(self):
+        return len(self.pcm)
+
+    def write(self, chunk):
+        self.pcm += chunk
+
+    def reset(self):
+        self.pcm = bytearray()
+
+    def finish(self):
+        return np.frombuffer(self.pcm, dtype=np.float32)
+
+    def abort(self):
+        self.pcm = bytearray()
+
+
+def _decode(proc, state, sink, on_progress, progress_interval, chunk_size):
+    last_report = 0
+    while True:
+        chunk = proc.stdout.read(chunk_size)
+        if not chunk:
+            break
+        sink.write(chunk)
+        if on_progress and time.time() - last_report >= progress_interval:
+            last_report = time.time()
+            on_progress({
+                "bytes": state["bytes"],
+                "totalBytes": state["total"],
+                "audioSeconds": round(sink.size / BYTES_PER_SECOND, 1),
+            })
+
+
+def stream_audio(video_url, on_progress=None, progress_interval=5.0, chunk_size=1 << 20, timeout=60, sink=None):
+    """Streams a remote video through ffmpeg into a 16 kHz mono float32 array.
+
+    The HTTP body is piped straight into ffmpeg's stdin, so the video is never
+    written to disk and decoding starts with the first bytes. MP4s whose index
+    (moov atom) sits at the end of the file can't be demuxed from a pipe; for
+    those ffmpeg is pointed at the URL itself and seeks with range requests,
+    which still avoids a local copy.
+
+    `on_progress(dict)` is called at most every `progress_interval` seconds with
+    downloaded bytes, total bytes (if known) and decoded audio seconds.
+
+    Decoded PCM goes to `sink` (write/reset/finish/abort, e.g. an
+    audio_store.StoreWriter), or is collected in memory if none is given;
+    the return value is whatever `sink.finish()` gives back.
+    """
+    sink = sink or _MemorySink()
+    try:
+        return _stream(video_url, sink, on_progress, progress_interval, chunk_size, timeout)
+    except BaseException:
+        sink.abort()
+        raise
+
+
+def _stream(video_url, sink, on_progress, progress_interval, chunk_size, timeout):
+    started = time.time()
+    response = urllib.request.urlopen(video_url, timeout=timeout)
+    state = {"bytes": 0, "total": int(response.headers.get("Content-Length") or 0) or None, "error": None}
+
+    proc = subprocess.Popen(_ffmpeg_cmd("pipe:0"), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    feeder = threading.Thread(target=_feed, args=(response, proc, state, chunk_size), daemon=True)
+    feeder.start()
+    # Drain stderr concurrently so a chatty ffmpeg can't block on a full pipe
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    stderr_reader.start()
+
+    _decode(proc, state, sink, on_progress, progress_interval, chunk_size)
+    proc.wait()
+    feeder.join()
+    stderr_reader.join()
+    response.close()
+
+    if state["error"]:
+        raise IngestError(f"Download failed after {state['bytes']} bytes: {state['error']}")
+
+    if proc.returncode != 0 or not sink.size:
+        stderr = b"".join(stderr_chunks).decode("utf-8", "replace").strip()
+        print(f"Piped decode failed ({stderr[-200:]}), retrying with ffmpeg reading the URL")
+        proc = subprocess.Popen(_ffmpeg_cmd(video_url), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+        stderr_reader.start()
+        state["bytes"] = 0
+        sink.reset()
+        _decode(proc, state, sink, on_progress, progress_interval, chunk_size)
+        proc.wait()
+        stderr_reader.join()
+        if proc.returncode != 0 or not sink.size:
+            stderr = b"".join(stderr_chunks).decode("utf-8", "replace").strip()
+            raise IngestError(f"ffmpeg failed to decode audio: {stderr[-500:]}")
+
+    audio = sink.finish()
+    if on_progress:
+        on_progress({
+            "bytes": state["bytes"],
+            "totalBytes": state["total"],
+            "audioSeconds": round(len(audio) / SAMPLE_RATE, 1),
+            "seconds": round(time.time() - started, 1),
+            "done": True,
+        })
+    return audio
@@ -0,0 +1,274 @@
+"""Durable multi-node job queue: a Firestore lease table plus per-stage checkpoints in R2.
+
+Every worker process polls the same `captionJobs` collection and claims
+queued jobs with a transaction, taking a lease it renews by heartbeat while
+the job runs. A job whose lease runs out (worker killed, node lost) is put
+back in the queue by whichever worker reaps it next, up to `max_attempts`.
+Stage results are checkpointed in R2 so the worker that picks it up resumes
+after the last finished stage instead of transcribing again.
+
+Only single-field indexes are needed: `queuedAt` is set only while a job is
+queued and `leaseExpires` only while it is leased, so both the claim and the
+reaper queries are a range over one field.
+"""
+
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+
+from botocore.exceptions import ClientError
+from firebase_admin import firestore
+
+
+class LeaseQueue:
+    """Firestore-backed job queue with leases, heartbeats and a reaper."""
+
+    def __init__(self, get_db, node_id=None, collection="captionJobs", lease_seconds=120,
+                 heartbeat_seconds=30, poll_seconds=5, max_attempts=3, checkpoints=None):
+        self.get_db = get_db
+        self.checkpoints = checkpoints
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        # Rough count of jobs waiting across all nodes, from the last claim query
+        self.backlog = 0
+        self._held = set()
+        self._lock = threading.Lock()
+
+    def _ref(self, video_id):
+        return self.get_db().collection(self.collection).document(video_id)
+
+    def enqueue(self, video_id, video_url):
+        """Adds a job, returning its record; a job already queued or leased is left alone.
+
+        A new job starts without checkpoints: whatever a finished or failed
+        earlier run (possibly of another videoUrl) left behind is cleared.
+        """
+        db = self.get_db()
+        ref = db.collection(self.collection).document(video_id)
+
+        @firestore.transactional
+        def txn(transaction):
+            snapshot = ref.get(transaction=transaction)
+            job = snapshot.to_dict() if snapshot.exists else None
+            if job and job.get("state") in ("queued", "leased"):
+                return job
+            # Cleared before the job is visible to claim; a transaction retry just clears again
+            if self.checkpoints:
+                self.checkpoints.clear(video_id)
+            now = time.time()
+            job = {
+                "videoId": video_id,
+                "videoUrl": video_url,
+                "state": "queued",
+                "queuedAt": now,
+                "leaseExpires": None,
+                "owner": None,
+                "attempts": 0,
+                "enqueuedAt": now,
+                "updatedAt": now,
+            }
+            transaction.set(ref, job)
+            return job
+
+        return txn(db.transaction())
+
+    def claim(self):
+        """Leases the oldest queued job to this node, returning its record or None."""
+        db = self.get_db()
+        candidates = list(
+            db.collection(self.collection).where("queuedAt", ">", 0).order_by("queuedAt").limit(10).stream()
+        )
+        self.backlog = len(candidates)
+        for snapshot in candidates:
+            job = self._try_claim(db, snapshot.reference)
+            if job:
+                with self._lock:
+                    self._held.add(job["videoId"])
+                return job
+        return None
+
+    def _try_claim(self, db, ref):
+        @firestore.transactional
+        def txn(transaction):
+            snapshot = ref.get(transaction=transaction)
+            job = snapshot.to_dict() if snapshot.exists else None
+            # Another node got there first
+            if not job or job.get("state") != "queued":
+                return None
+            now = time.time()
+            update = {
+                "state": "leased",
+                "queuedAt": None,
+                "owner": self.node_id,
+                "leaseExpires": now + self.lease_seconds,
+                "attempts": job.get("attempts", 0) + 1,
+                "leasedAt": now,
+                "updatedAt": now,
+            }
+            transaction.update(ref, update)
+            job.update(update)
+            return job
+
+        return txn(db.transaction())
+
+    def heartbeat(self):
+        """Extends the leases this node holds; returns the ids whose lease was lost."""
+        with self._lock:
+            held = list(self._held)
+        lost = []
+        db = self.get_db()
+        for video_id in held:
+            ref = db.collection(self.collection).document(video_id)
+
+            @firestore.transactional
+            def txn(transaction):
+                snapshot = ref.get(transaction=transaction)
+                job = snapshot.to_dict() if snapshot.exists else None
+                if not job or job.get("state") != "leased" or job.get("owner") != self.node_id:
+                    return False
+                now = time.time()
+                transaction.update(ref, {"leaseExpires": now + self.lease_seconds, "updatedAt": now})
+                return True
+
+            if not txn(db.transaction()):
+                lost.append(video_id)
+        if lost:
+            with self._lock:
+                self._held.difference_update(lost)
+        return lost
+
+    def finished(self, video_id, state):
+        """Releases a lease once the job has run; `state` is "done" or "error"."""
+        with self._lock:
+            self._held.discard(video_id)
+
+        @firestore.transactional
+        def txn(transaction, ref):
+            snapshot = ref.get(transaction=transaction)
+            job = snapshot.to_dict() if snapshot.exists else None
+            if not job or job.get("owner") != self.node_id:
+                return
+            transaction.update(ref, {
+                "state": state,
+                "owner": None,
+                "leaseExpires": None,
+                "finishedAt": time.time(),
+                "updatedAt": time.time(),
+            })
+
+        try:
+            db = self.get_db()
+            txn(db.transaction(), db.collection(self.collection).document(video_id))
+        except Exception as e:
+            print(f"[queue] Failed to release lease for {video_id}: {e}")
+
+    def reap(self):
+        """Re-queues jobs whose lease expired; returns the ids given up on after max_attempts."""
+        db = self.get_db()
+        now = time.time()
+        expired = db.collection(self.collection).where("leaseExpires", "<", now).limit(50).stream()
+        abandoned = []
+        for snapshot in expired:
+            ref = snapshot.reference
+
+            @firestore.transactional
+            def txn(transaction):
+                current = ref.get(transaction=transaction)
+                job = current.to_dict() if current.exists else None
+                if not job or job.get("state") != "leased" or (job.get("leaseExpires") or 0) >= time.time():
+                    return None
+                update = {"owner": None, "leaseExpires": None, "updatedAt": time.time()}
+                if job.get("attempts", 0) >= self.max_attempts:
+                    update["state"] = "error"
+                else:
+                    update["state"] = "queued"
+                    update["queuedAt"] = time.time()
+                transaction.update(ref, update)
+                print(f"[queue] Lease on {job['videoId']} held by {job.get('owner')} expired, "
+                      f"{'giving up' if update['state'] == 'error' else 're-queued'} after {job.get('attempts', 0)} attempt(s)")
+                return update["state"]
+
+            if txn(db.transaction()) == "error":
+                abandoned.append(snapshot.id)
+        return abandoned
+
+    def status(self, video_id):
+        snapshot = self._ref(video_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def start(self, scheduler, on_abandon=None):
+        threading.Thread(target=self._run, args=(scheduler, on_abandon), name="lease-queue", daemon=True).start()
+
+    def _run(self, scheduler, on_abandon):
+        last_beat = 0
+        while True:
+            try:
+                if time.time() - last_beat >= self.heartbeat_seconds:
+                    last_beat = time.time()
+                    for video_id in self.heartbeat():
+                        print(f"[{video_id}] Lost the job lease; another worker may run it again")
+                    for video_id in self.reap():
+                        if on_abandon:
+                            on_abandon(video_id)
+
+                # Claim while the pipeline's intake is short; leased jobs further along are being worked on
+                while True:
+                    depth = scheduler.depth()
+                    if depth["queued"] >= depth["slots"]:
+                        break
+                    job = self.claim()
+                    if not job:
+                        break
+                    print(f"[{job['videoId']}] Claimed job (attempt {job['attempts']}) as {self.node_id}")
+                    scheduler.submit(job["videoId"], job["videoUrl"])
+            except Exception as e:
+                print(f"[queue] Poll failed: {e}")
+            time.sleep(self.poll_seconds)
+
+
+class StageCheckpoints:
+    """Per-stage job results stored in R2 under jobs/<video_id>/<stage>.json.gz."""
+
+    def __init__(self, s3, bucket, prefix="jobs"):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, video_id, stage):
+        return f"{self.prefix}/{video_id}/{stage}.json.gz"
+
+    def load(self, video_id, stage):
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self._key(video_id, stage))
+            return json.loads(gzip.decompress(obj["Body"].read()))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                print(f"[{video_id}] Failed to read {stage} checkpoint: {e}")
+        except Exception as e:
+            print(f"[{video_id}] Failed to read {stage} checkpoint: {e}")
+        return None
+
+    def save(self, video_id, stage, data):
+        """Stores a stage result; a failed write only costs redoing the stage on resume."""
+        try:
+            body = gzip.compress(json.dumps(data).encode("utf-8"), mtime=0)
+            self.s3.put_object(Bucket=self.bucket, Key=self._key(video_id, stage), Body=body,
+                               ContentType="application/json", ContentEncoding="gzip")
+        except Exception as e:
+            print(f"[{video_id}] Failed to write {stage} checkpoint: {e}")
+
+    def clear(self, video_id):
+        try:
+            listing = self.s3.list_objects_v2(Bucket=self.bucket, Prefix=f"{self.prefix}/{video_id}/")
+            keys = [{"Key": obj["Key"]} for obj in listing.get("Contents", [])]
+            if keys:
+                self.s3.delete_objects(Bucket=self.bucket, Delete={"Objects": keys})
+        except Exception as e:
+            print(f"[{video_id}] Failed to clear checkpoints: {e}")
@@ -0,0 +1,85 @@
+import os
+import random
+import threading
+import time
+
+import openai
+from openai import OpenAI
+
+import telemetry
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 5))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 1.0))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 30.0))
+# Cap on OpenAI requests in flight across all jobs in this process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+_client = None
+_client_lock = threading.Lock()
+_in_flight = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+def get_client():
+    """Returns the process-wide OpenAI client, or None if no API key is configured.
+
+    The client is thread-safe and keeps its HTTP connection pool warm across
+    calls, so all cleanup and translation requests share it.
+    """
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return None
+        with _client_lock:
+            if _client is None:
+                # Retries are handled below so backoff is jittered and logged per call
+                _client = OpenAI(api_key=api_key, max_retries=0)
+    return _client
+
+
+def _retry_delay(error, attempt):
+    """Full-jitter exponential backoff, honouring a Retry-After header when present."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, 1)
+            except ValueError:
+                pass
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def complete(prompt, tag=""):
+    """Runs a single-prompt chat completion, retrying rate limits and transient errors."""
+    client = get_client()
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY missing")
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            with _in_flight:
+                # Timed inside the semaphore so queueing for a slot isn't counted as latency
+                started = time.time()
+                response = client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0,
+                )
+            telemetry.observe_llm_request(time.time() - started, "ok", response.usage)
+            return response.choices[0].message.content.strip()
+        except RETRYABLE_ERRORS as e:
+            telemetry.observe_llm_request(time.time() - started, type(e).__name__)
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            print(f"{tag} {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{LLM_MAX_RETRIES})")
+            time.sleep(delay)
@@ -1,14 +1,38 @@
 import os
-import subprocess
+import sys
 import whisperx
+import numpy as np
 import json
 import boto3
+import gzip
+import hashlib
+import hmac
+import io
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
 import time
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import firebase_admin
 from firebase_admin import credentials, firestore
 import traceback
-from openai import OpenAI
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import llm
+import telemetry
+import chunking
+from model_pool import ModelPool
+from scheduler import JobScheduler, QueueFull
+from captions import generate_vtt, render_vtt, parse_vtt, match_cues
+from cache import ContentCache, content_hash
+from audio_store import AudioStore
+from ingest import stream_audio, SAMPLE_RATE
+import vad
+import segmenter
+import autotune
+from jobqueue import LeaseQueue, StageCheckpoints
+from status import StatusReporter
 
 app = Flask(__name__)
 
@@ -19,268 +43,876 @@ try:
     firebase_admin.initialize_app(cred)
     db = firestore.client()
 except Exception as e:
+    db = None
     print(f"Firebase not initialized: {e}. Ensure firebase-adminsdk.json is present.")
 
+# All videoCaptions status writes go through here so they're coalesced and batched across jobs
+status = StatusReporter(lambda: db, flush_interval=float(os.getenv("STATUS_FLUSH_INTERVAL", 1.0)))
+
 # R2 Client Initialization
 S3_ENDPOINT = os.getenv("R2_ENDPOINT")
 S3_ACCESS_KEY = os.getenv("R2_ACCESS_KEY")
 S3_SECRET_KEY = os.getenv("R2_SECRET_KEY")
 S3_BUCKET = os.getenv("R2_BUCKET", "fp2p-content")
 
+# Uploads run in parallel, so the connection pool must be at least as wide as the upload pool
+R2_UPLOAD_CONCURRENCY = int(os.getenv("R2_UPLOAD_CONCURRENCY", 6))
+# gzip, br (needs the brotli package) or identity
+R2_CONTENT_ENCODING = os.getenv("R2_CONTENT_ENCODING", "gzip")
+
 s3 = boto3.client('s3',
     endpoint_url=S3_ENDPOINT,
     aws_access_key_id=S3_ACCESS_KEY,
-    aws_secret_access_key=S3_SECRET_KEY
+    aws_secret_access_key=S3_SECRET_KEY,
+    config=BotoConfig(
+        max_pool_connections=max(10, R2_UPLOAD_CONCURRENCY * 2),
+        retries={'max_attempts': 5, 'mode': 'adaptive'},
+        tcp_keepalive=True
+    )
 )
 
-def format_vtt_time(seconds):
-    """Formats seconds into WEBVTT timestamp: HH:MM:SS.mmm"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}".replace(',', '.')
-
-def generate_vtt(segments, output_path):
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("WEBVTT\n\n")
-        for i, seg in enumerate(segments):
-            start = format_vtt_time(seg['start'])
-            end = format_vtt_time(seg['end'])
-            text = seg['text'].strip()
-            # Handle potential empty text
-            if not text:
-                continue
-            f.write(f"{i+1}\n{start} --> {end}\n{text}\n\n")
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def env_list(name, default=""):
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+# WhisperX settings, tuned to the host at startup (USE_CUDA=true/false overrides CUDA detection)
+HOST = autotune.probe_host()
+ASR_MODEL = os.getenv("ASR_MODEL", "large-v3")
+TRANSCRIPTION_SLOTS = int(os.getenv("TRANSCRIPTION_SLOTS", 1))
+autotuner = autotune.Autotuner(
+    HOST,
+    # Fallback models for short clips when the queue backs up, best first
+    [ASR_MODEL] + [m for m in env_list("AUTOTUNE_FALLBACK_MODELS", "medium,small") if m != ASR_MODEL],
+    slots=TRANSCRIPTION_SLOTS,
+    short_seconds=float(os.getenv("AUTOTUNE_SHORT_SECONDS", 600)),
+    backlog=int(os.getenv("AUTOTUNE_BACKLOG", 3)),
+    batch_size=int(os.getenv("BATCH_SIZE", 0)) or None # set to pin the batch size
+)
+DEVICE = autotuner.base["device"]
+COMPUTE_TYPE = autotuner.base["computeType"]
+BATCH_SIZE = autotuner.base["batchSize"]
+print(f"[autotune] {HOST['cores']} cores, {HOST['memoryMb']} MB RAM, ISA {','.join(HOST['isa']) or 'baseline'}, "
+      f"CUDA {HOST['cuda']['name'] if HOST['cuda'] else 'none'} -> {json.dumps(autotuner.base)}")
+
+# Long videos are transcribed in windows and partial English captions published after each one
+STREAMING_CAPTIONS = os.getenv("STREAMING_CAPTIONS", "true") == "true"
+STREAMING_WINDOW_SECONDS = int(os.getenv("STREAMING_WINDOW_SECONDS", 300))
+
+# VAD pre-pass: only speech regions are sent to WhisperX (aggressiveness 0-3)
+VAD_PREPASS = os.getenv("VAD_PREPASS", "true") == "true"
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", 2))
+VAD_PAD_SECONDS = float(os.getenv("VAD_PAD_SECONDS", 0.3))
+VAD_MERGE_GAP_SECONDS = float(os.getenv("VAD_MERGE_GAP_SECONDS", 0.8))
+# Skip the repack when nearly everything is speech, there's nothing to save
+VAD_MAX_SPEECH_RATIO = float(os.getenv("VAD_MAX_SPEECH_RATIO", 0.9))
+
+# Cues are rebuilt from word timings under these readability limits
+RESEGMENT_CUES = os.getenv("RESEGMENT_CUES", "true") == "true"
+CUE_LIMITS = {
+    "max_chars_per_line": int(os.getenv("CUE_MAX_CHARS_PER_LINE", 42)),
+    "max_lines": int(os.getenv("CUE_MAX_LINES", 2)),
+    "max_cps": float(os.getenv("CUE_MAX_CPS", 17)),
+    "min_seconds": float(os.getenv("CUE_MIN_SECONDS", 1.0)),
+    "max_seconds": float(os.getenv("CUE_MAX_SECONDS", 7.0)),
+}
+
+# Backfill: silence between clips sharing a transcribe call (must exceed WhisperX's 30s VAD chunk)
+BACKFILL_GAP_SECONDS = float(os.getenv("BACKFILL_GAP_SECONDS", 31))
+
+# Shared secret the webhook caller sends as X-Worker-Secret (api/captions.js)
+WORKER_SECRET = os.getenv("CAPTION_WORKER_SECRET", "").strip()
+
+# JOB_QUEUE=firestore shares one durable queue (the captionJobs lease table) across worker nodes
+JOB_QUEUE = os.getenv("JOB_QUEUE", "memory")
+# Per-stage results in R2 so a re-claimed job resumes where it stopped. Only the Firestore queue
+# re-claims jobs (the memory queue is gone after a restart), so checkpoints are off without it.
+JOB_CHECKPOINTS = JOB_QUEUE == "firestore" and os.getenv("JOB_CHECKPOINTS", "true") == "true"
+
+# Max OpenAI translation calls in flight per job
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", 3))
+
+# Bump when the cleanup/translation prompts change so cached LLM output is ignored
+PROMPT_VERSION = "2"
+# Bump when transcription post-processing changes so cached transcripts are ignored
+TRANSCRIPT_VERSION = "1"
+
+cache = ContentCache(
+    os.getenv("CACHE_PATH", "cache/worker_cache.sqlite3"),
+    max_bytes=int(os.getenv("CACHE_MAX_MB", 2048)) * 1024 * 1024
+)
+
+LANGUAGES = {
+    'es': 'Spanish (Latin American)',
+    'fr': 'French',
+    'de': 'German',
+    'ja': 'Japanese',
+    'it': 'Italian'
+}
 
-def cleanup_captions(video_id, raw_vtt_path):
+# Resident model pool shared by all jobs in this process
+model_pool = ModelPool(
+    max_models=int(os.getenv("MODEL_POOL_MAX_MODELS", 4)),
+    min_free_mb=int(os.getenv("MODEL_POOL_MIN_FREE_MB", 2048))
+)
+# Decoded audio is written once to memory-mapped files that retries and other workers on this host reuse
+audio_store = AudioStore(
+    os.getenv("AUDIO_STORE_PATH", "cache/audio"),
+    max_bytes=int(os.getenv("AUDIO_STORE_MAX_MB", 8192)) * 1024 * 1024,
+    max_age_seconds=float(os.getenv("AUDIO_STORE_MAX_AGE_HOURS", 24)) * 3600
+) if os.getenv("AUDIO_STORE", "true") == "true" else None
+STARTED_AT = time.time()
+WARMUP_DONE = threading.Event()
+
+def warm_up_models():
+    """Loads the default ASR and alignment models so the first job doesn't pay for it."""
+    model_pool.warm_up(
+        env_list("WARMUP_ASR_MODELS", ASR_MODEL),
+        env_list("WARMUP_ALIGN_LANGUAGES", "en"),
+        DEVICE,
+        COMPUTE_TYPE,
+        autotuner.base["threads"]
+    )
+    WARMUP_DONE.set()
+
+def context_section(before_vtt, after_vtt):
+    """Formats the read-only neighbouring cues that surround a chunk."""
+    section = ""
+    if before_vtt:
+        section += f"""
+        PRECEDING CUES (context only, do NOT return these):
+        {before_vtt}
+        """
+    if after_vtt:
+        section += f"""
+        FOLLOWING CUES (context only, do NOT return these):
+        {after_vtt}
+        """
+    return section
+
+def cleanup_captions(video_id, cues):
     """Uses LLM to clean up the transcript while keeping timestamps intact."""
     print(f"[{video_id}] Starting LLM Cleanup Phase...")
     try:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if llm.get_client() is None:
             print(f"[{video_id}] OPENAI_API_KEY missing. Skipping cleanup.")
-            return raw_vtt_path
-
-        client = OpenAI(api_key=api_key)
-        
-        with open(raw_vtt_path, 'r', encoding='utf-8') as f:
-            vtt_content = f.read()
+            return cues
 
-        prompt = f"""
+        def build_prompt(vtt_content, before_vtt, after_vtt):
+            return f"""
         You are a professional subtitle editor. Clean up the following WebVTT content for a gaming masterclass.
         
         STRICT RULES:
-        1. Keep timestamps EXACTLY the same.
+        1. Keep cue numbers and timestamps EXACTLY the same.
         2. Do NOT merge, skip, or split blocks.
         3. Remove filler words (uh, um, you know, basically, so yeah).
         4. Fix grammar, capitalization, and punctuation.
         5. Preserve technical/gaming terms (e.g., piece control, box fight, tunneling, 90s).
-        6. Return ONLY the valid WebVTT content. No explanations.
-        
+        6. Return ONLY the cleaned cues from VTT CONTENT as WebVTT blocks. No explanations.
+        {context_section(before_vtt, after_vtt)}
         VTT CONTENT:
         {vtt_content}
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
-
-        cleaned_content = response.choices[0].message.content.strip()
-        
-        # Ensure it starts with WEBVTT
-        if not cleaned_content.startswith("WEBVTT"):
-            cleaned_content = "WEBVTT\n\n" + cleaned_content
-
-        cleaned_vtt_path = f"{video_id}_en.vtt"
-        with open(cleaned_vtt_path, 'w', encoding='utf-8') as f:
-            f.write(cleaned_content)
-        
-        return cleaned_vtt_path
+        tag = f"[{video_id}] Cleanup:"
+        with telemetry.span('cleanup', video_id, cues=len(cues)):
+            cleaned, failed = chunking.process_cues(
+                cues, build_prompt, lambda p: llm.complete(p, tag=tag), tag=tag,
+                cache=cache, cache_scope=("cleanup", PROMPT_VERSION, "en", llm.LLM_MODEL)
+            )
+        if failed:
+            print(f"[{video_id}] Cleanup kept raw text for {failed} chunk(s)")
+        if RESEGMENT_CUES:
+            # Edits change line lengths; re-balance within the same limits
+            for cue in cleaned:
+                cue['text'] = segmenter.balance_lines(cue['text'], CUE_LIMITS['max_chars_per_line'], CUE_LIMITS['max_lines'])
+        return cleaned
     except Exception as e:
         print(f"[{video_id}] Cleanup Error: {e}")
-        return raw_vtt_path
+        return cues
 
-def translate_captions(video_id, en_vtt_path, lang_code, lang_name):
-    """Translates the VTT content to a target language using LLM."""
+def translate_captions(video_id, cues, lang_code, lang_name):
+    """Translates the cues to a target language using LLM and writes the VTT file."""
     print(f"[{video_id}] Translating to {lang_name}...")
     try:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if llm.get_client() is None:
             return None
 
-        client = OpenAI(api_key=api_key)
-        
-        with open(en_vtt_path, 'r', encoding='utf-8') as f:
-            vtt_content = f.read()
-
-        prompt = f"""
+        def build_prompt(vtt_content, before_vtt, after_vtt):
+            return f"""
         Translate the following WebVTT content from English to {lang_name}.
         
         STRICT RULES:
-        1. Keep timestamps EXACTLY the same.
+        1. Keep cue numbers and timestamps EXACTLY the same.
         2. Do NOT merge, skip, or split blocks.
         3. The tone should be natural and professional, suitable for a gaming masterclass.
         4. Preserve technical/gaming terms that are standard in {lang_name} or use native equivalents.
-        5. Return ONLY the valid WebVTT content in {lang_name}. No explanations.
-        
+        5. Return ONLY the translated cues from VTT CONTENT as WebVTT blocks in {lang_name}. No explanations.
+        {context_section(before_vtt, after_vtt)}
         VTT CONTENT:
         {vtt_content}
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
-
-        translated_content = response.choices[0].message.content.strip()
-        
-        if not translated_content.startswith("WEBVTT"):
-            translated_content = "WEBVTT\n\n" + translated_content
+        tag = f"[{video_id}] Translation ({lang_code}):"
+        with telemetry.span('translate', video_id, lang=lang_code, cues=len(cues)):
+            translated, failed = chunking.process_cues(
+                cues, build_prompt, lambda p: llm.complete(p, tag=tag), tag=tag,
+                cache=cache, cache_scope=("translate", PROMPT_VERSION, lang_code, llm.LLM_MODEL)
+            )
+        if failed:
+            # Untranslated English cues are worse than no track at all
+            print(f"[{video_id}] {failed} chunk(s) failed to translate to {lang_name}, dropping {lang_code}")
+            return None
 
+        # Round-trip the document in memory so a cue the model mangled never reaches R2
+        vtt = render_vtt(translated)
+        match_cues(translated, parse_vtt(vtt))
         translated_vtt_path = f"{video_id}_{lang_code}.vtt"
-        with open(translated_vtt_path, 'w', encoding='utf-8') as f:
-            f.write(translated_content)
+        with open(translated_vtt_path, "w", encoding="utf-8") as f:
+            f.write(vtt)
         
         return translated_vtt_path
     except Exception as e:
         print(f"[{video_id}] Translation Error ({lang_code}): {e}")
         return None
 
+def translate_all(video_id, cues, languages):
+    """Fans translations out across a thread pool; a failed language is just left out."""
+    paths = {}
+    with ThreadPoolExecutor(max_workers=TRANSLATION_CONCURRENCY) as pool:
+        futures = {
+            pool.submit(translate_captions, video_id, cues, lang_code, lang_name): lang_code
+            for lang_code, lang_name in languages.items()
+        }
+        for future in as_completed(futures):
+            lang_code = futures[future]
+            try:
+                t_path = future.result()
+            except Exception as e:
+                print(f"[{video_id}] Translation Error ({lang_code}): {e}")
+                continue
+            if t_path:
+                paths[lang_code] = t_path
+    return paths
+
+def compress_for_cdn(data):
+    """Pre-compresses a caption body, returning (body, Content-Encoding or None)."""
+    if R2_CONTENT_ENCODING == "br" and brotli is not None:
+        return brotli.compress(data, quality=11), "br"
+    if R2_CONTENT_ENCODING in ("gzip", "br"):
+        # mtime=0 keeps the output byte-identical for identical input
+        return gzip.compress(data, compresslevel=9, mtime=0), "gzip"
+    return data, None
+
+def upload_caption(video_id, lang, local_path):
+    """Uploads one VTT file unless R2 already holds the same content; returns its key."""
+    key = f"captions/{video_id}/{lang}.vtt"
+    with open(local_path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    body, encoding = compress_for_cdn(data)
+    
+    with telemetry.span('upload', video_id, lang=lang, bytes=len(body)) as attrs:
+        try:
+            head = s3.head_object(Bucket=S3_BUCKET, Key=key)
+            if head.get('Metadata', {}).get('content-sha256') == digest and head.get('ContentEncoding') == encoding:
+                print(f"[{video_id}] {lang} unchanged in R2, skipping upload")
+                attrs['skipped'] = True
+                return key
+        except ClientError:
+            pass
+        
+        extra_args = {'ContentType': 'text/vtt; charset=utf-8', 'Metadata': {'content-sha256': digest}}
+        if encoding:
+            extra_args['ContentEncoding'] = encoding
+        s3.upload_fileobj(io.BytesIO(body), S3_BUCKET, key, ExtraArgs=extra_args, Config=TRANSFER_CONFIG)
+    print(f"[{video_id}] Uploaded {lang} to {key} ({len(data)} -> {len(body)} bytes)")
+    return key
+
 def upload_to_r2(video_id, vtt_paths):
-    """Uploads the VTT files to R2 and returns their public keys/paths."""
+    """Uploads the VTT files to R2 in parallel and returns their public keys/paths."""
     print(f"[{video_id}] Uploading VTTs to R2...")
     r2_paths = {}
+    with ThreadPoolExecutor(max_workers=R2_UPLOAD_CONCURRENCY) as pool:
+        futures = {
+            pool.submit(upload_caption, video_id, lang, local_path): lang
+            for lang, local_path in vtt_paths.items()
+        }
+        for future in as_completed(futures):
+            lang = futures[future]
+            try:
+                r2_paths[lang] = future.result()
+            except Exception as e:
+                print(f"[{video_id}] R2 Upload Error ({lang}): {e}")
+    return r2_paths or None
+
+def source_fingerprint(video_url):
+    """Identifies the source file from its HTTP validators without downloading it."""
     try:
-        for lang, local_path in vtt_paths.items():
-            key = f"captions/{video_id}/{lang}.vtt"
-            s3.upload_file(
-                local_path, 
-                S3_BUCKET, 
-                key, 
-                ExtraArgs={'ContentType': 'text/vtt'}
-            )
-            r2_paths[lang] = key
-            print(f"[{video_id}] Uploaded {lang} to {key}")
-        return r2_paths
+        req = urllib.request.Request(video_url, method="HEAD")
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            etag = resp.headers.get("ETag")
+            modified = resp.headers.get("Last-Modified")
+            length = resp.headers.get("Content-Length")
     except Exception as e:
-        print(f"[{video_id}] R2 Upload Error: {e}")
+        print(f"HEAD {video_url} failed: {e}")
+        return None
+    if not etag and not (modified and length):
         return None
+    return content_hash(video_url, etag or "", modified or "", length or "")
+
+def set_stage(video_id, stage, fields=None):
+    """Records a stage change on both the in-memory job and the videoCaptions document."""
+    scheduler.set_stage(video_id, stage)
+    status.stage(video_id, stage, fields)
+
+def report_ingest_progress(video_id, progress):
+    """Mirrors download/decode progress onto the videoCaptions document."""
+    status.update(video_id, {'ingestProgress': progress})
+
+def transcript_settings(profile=None):
+    profile = profile or autotuner.base
+    settings = {"model": profile["model"], "computeType": profile["computeType"], "language": "en", "version": TRANSCRIPT_VERSION}
+    if VAD_PREPASS:
+        settings["vad"] = [VAD_AGGRESSIVENESS, VAD_PAD_SECONDS, VAD_MERGE_GAP_SECONDS]
+    if RESEGMENT_CUES:
+        settings["cues"] = CUE_LIMITS
+    return settings
+
+def segments_to_cues(segments, to_time=lambda t: t):
+    """Turns aligned segments into cues on the video timeline, regrouped by word timings if enabled."""
+    if RESEGMENT_CUES:
+        return segmenter.resegment(segments, to_time=to_time, **CUE_LIMITS)
+    return [
+        {'start': to_time(seg['start']), 'end': to_time(seg['end']), 'text': seg['text'].strip()}
+        for seg in segments if seg['text'].strip()
+    ]
+
+def quiet_split_point(audio, target, search_seconds=2.0, frame_seconds=0.1):
+    """Finds the quietest frame in the seconds before `target` so a window cut doesn't split a word."""
+    frame = int(frame_seconds * SAMPLE_RATE)
+    lo = max(0, target - int(search_seconds * SAMPLE_RATE))
+    region = audio[lo:target]
+    frames = len(region) // frame
+    if frames < 2:
+        return target
+    energy = (region[:frames * frame].reshape(frames, frame) ** 2).mean(axis=1)
+    return lo + int(energy.argmin()) * frame + frame // 2
+
+def speech_layout(video_id, audio):
+    """Runs the VAD pre-pass, returning a vad.Layout of the speech or None to use the audio as is."""
+    with telemetry.span('vad', video_id, audioSeconds=round(len(audio) / SAMPLE_RATE, 1)) as attrs:
+        regions = vad.speech_regions(
+            audio, SAMPLE_RATE, aggressiveness=VAD_AGGRESSIVENESS,
+            pad_seconds=VAD_PAD_SECONDS, merge_gap_seconds=VAD_MERGE_GAP_SECONDS
+        )
+        layout = vad.Layout(audio, regions, SAMPLE_RATE)
+        attrs['speechSeconds'] = round(layout.speech_samples / SAMPLE_RATE, 1)
+        attrs['regions'] = len(regions)
+    if layout.speech_samples > len(audio) * VAD_MAX_SPEECH_RATIO:
+        return None
+    print(f"[{video_id}] VAD kept {layout.speech_samples / SAMPLE_RATE:.0f}s of speech "
+          f"from {len(audio) / SAMPLE_RATE:.0f}s in {len(regions)} region(s)")
+    return layout
+
+def transcribe_window(video_id, model, model_a, metadata, audio, offset_seconds, batch_size=BATCH_SIZE):
+    """Transcribes and aligns one stretch of audio, shifting cues onto the full timeline."""
+    layout = speech_layout(video_id, audio) if VAD_PREPASS else None
+    if layout is not None:
+        if not layout.speech_samples:
+            return []
+        audio = layout.audio
+    
+    audio_seconds = round(len(audio) / SAMPLE_RATE, 1)
+    with telemetry.span('transcribe', video_id, audioSeconds=audio_seconds, offset=offset_seconds):
+        result = model.transcribe(audio, batch_size=batch_size)
+    if not result["segments"]:
+        return []
+    with telemetry.span('align', video_id, audioSeconds=audio_seconds, segments=len(result["segments"])):
+        result = whisperx.align(result["segments"], model_a, metadata, audio, DEVICE, return_char_alignments=False)
+    
+    # Map times on the packed speech back onto this window, then onto the full video
+    to_window = layout.to_original if layout is not None else (lambda t: t)
+    return segments_to_cues(result["segments"], lambda t: to_window(t) + offset_seconds)
+
+def choose_profile(audio_seconds):
+    """Picks the transcription profile for a job given its length and the current backlog."""
+    depth = scheduler.depth()
+    queued = depth["queued"] + depth["stages"]["transcribe"]["waiting"]
+    if job_queue:
+        queued = max(queued, job_queue.backlog)
+    return autotuner.choose(audio_seconds, queued)
+
+def transcribe_audio(video_id, audio, on_window=None, profile=None):
+    """Transcribes and aligns decoded audio, returning non-empty cues.
+
+    With STREAMING_CAPTIONS, audio longer than a window is processed in
+    STREAMING_WINDOW_SECONDS pieces cut at quiet points, and
+    `on_window(cues_so_far, progress_seconds)` is called after each one.
+    The profile used and its real-time factor are recorded on the job.
+    """
+    audio_seconds = len(audio) / SAMPLE_RATE
+    profile = profile or choose_profile(audio_seconds)
+    print(f"[{video_id}] Getting model ({profile['model']}) on {profile['device']}...")
+    model, (model_a, metadata) = model_pool.get_pipeline(
+        profile['model'], profile['device'], profile['computeType'], profile['threads'], "en"
+    )
+    
+    started = time.time()
+    window = STREAMING_WINDOW_SECONDS * SAMPLE_RATE
+    if not STREAMING_CAPTIONS or len(audio) <= window * 1.25:
+        set_stage(video_id, 'transcribing')
+        print(f"[{video_id}] Transcribing...")
+        cues = transcribe_window(video_id, model, model_a, metadata, audio, 0.0, profile['batchSize'])
+    else:
+        cues = []
+        pos = 0
+        while pos < len(audio):
+            # Fold a short tail into the last window rather than transcribing a sliver
+            end = len(audio) if len(audio) - pos <= window * 1.25 else quiet_split_point(audio, pos + window)
+            set_stage(video_id, 'transcribing')
+            print(f"[{video_id}] Transcribing {pos / SAMPLE_RATE:.0f}s-{end / SAMPLE_RATE:.0f}s...")
+            cues.extend(transcribe_window(video_id, model, model_a, metadata, audio[pos:end], pos / SAMPLE_RATE, profile['batchSize']))
+            pos = end
+            if on_window:
+                on_window(cues, pos / SAMPLE_RATE)
+    
+    rtf = round((time.time() - started) / max(audio_seconds, 1e-6), 4)
+    print(f"[{video_id}] Transcribed with {profile['model']}/{profile['computeType']} at RTF {rtf}")
+    telemetry.log_event("asr_profile", videoId=video_id, audioSeconds=round(audio_seconds, 1), realTimeFactor=rtf, **profile)
+    status.update(video_id, {'asrProfile': dict(profile, realTimeFactor=rtf, audioSeconds=round(audio_seconds, 1))})
+    return cues
+
+def transcribe_batch(items):
+    """Transcribes several short videos in one model.transcribe call.
+
+    `items` is a list of (video_id, audio). The clips are concatenated with
+    BACKFILL_GAP_SECONDS of silence between them, long enough that WhisperX's
+    VAD never merges speech from two videos into one chunk. Segments are then
+    split back out by offset and aligned against their own video's audio.
+    Returns {video_id: cues}.
+    """
+    model, (model_a, metadata) = model_pool.get_pipeline(ASR_MODEL, DEVICE, COMPUTE_TYPE, autotuner.base["threads"], "en")
+    
+    gap = np.zeros(int(BACKFILL_GAP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+    results = {}
+    parts = []
+    spans = []
+    pos = 0
+    for video_id, audio in items:
+        set_stage(video_id, 'transcribing')
+        # Same VAD pre-pass as transcribe_window, so the cached transcript matches its key
+        layout = speech_layout(video_id, audio) if VAD_PREPASS else None
+        if layout is not None:
+            if not layout.speech_samples:
+                results[video_id] = []
+                continue
+            audio = layout.audio
+        spans.append((video_id, pos, len(audio), layout))
+        parts.extend([audio, gap])
+        pos += len(audio) + len(gap)
+    if not parts:
+        return results
+    combined = np.concatenate(parts)
+    
+    print(f"[batch] Transcribing {len(spans)} videos ({len(combined) / SAMPLE_RATE:.0f}s) in one pass...")
+    with telemetry.span('transcribe', None, videos=len(spans), audioSeconds=round(len(combined) / SAMPLE_RATE, 1)):
+        segments = model.transcribe(combined, batch_size=BATCH_SIZE)["segments"]
+    
+    for video_id, start, length, layout in spans:
+        lo = start / SAMPLE_RATE
+        hi = (start + length) / SAMPLE_RATE
+        own = [
+            {**seg, 'start': max(0.0, seg['start'] - lo), 'end': min(hi - lo, seg['end'] - lo)}
+            for seg in segments if lo <= (seg['start'] + seg['end']) / 2 < hi
+        ]
+        audio = combined[start:start + length]
+        if own:
+            with telemetry.span('align', video_id, audioSeconds=round(length / SAMPLE_RATE, 1), segments=len(own)):
+                own = whisperx.align(own, model_a, metadata, audio, DEVICE, return_char_alignments=False)["segments"]
+        results[video_id] = segments_to_cues(own, layout.to_original if layout is not None else (lambda t: t))
+    return results
+
+def partial_captions_key(video_id):
+    return f"captions/{video_id}/en.partial.vtt"
+
+def publish_partial_captions(video_id, cues, progress_seconds, duration_seconds):
+    """Uploads the English captions transcribed so far so the player can show them early."""
+    key = partial_captions_key(video_id)
+    try:
+        s3.put_object(
+            Bucket=S3_BUCKET,
+            Key=key,
+            Body=render_vtt(cues).encode("utf-8"),
+            ContentType='text/vtt',
+            CacheControl='no-cache'
+        )
+        status.update(video_id, {
+            'captionStatus': 'transcribing',
+            'partialVttFile': key,
+            'progressSeconds': round(progress_seconds, 1),
+            'durationSeconds': round(duration_seconds, 1)
+        })
+        print(f"[{video_id}] Published partial captions up to {progress_seconds:.0f}s")
+    except Exception as e:
+        print(f"[{video_id}] Partial publish failed: {e}")
+
+def delete_partial_captions(video_id):
+    """Removes the partial English track once the final captions are up (a no-op if none was published)."""
+    try:
+        s3.delete_object(Bucket=S3_BUCKET, Key=partial_captions_key(video_id))
+    except Exception as e:
+        print(f"[{video_id}] Failed to delete partial captions: {e}")
+
+def health():
+    return {
+        "status": "ok",
+        "warm": WARMUP_DONE.is_set(),
+        "uptimeSeconds": round(time.time() - STARTED_AT, 1),
+        "models": model_pool.snapshot(),
+        "queue": scheduler.depth(),
+        "stages": scheduler.stage_stats(),
+        "cache": cache.stats(),
+        "audioStore": audio_store.stats() if audio_store else None,
+        "statusWrites": {"commits": status.commits, "writes": status.writes},
+        "host": HOST,
+        "asrProfile": autotuner.base
+    }
+
+def worker_secret_ok(provided):
+    """Checks the X-Worker-Secret header against CAPTION_WORKER_SECRET (open if the secret is unset)."""
+    if not WORKER_SECRET:
+        return True
+    return hmac.compare_digest((provided or "").encode("utf-8"), WORKER_SECRET.encode("utf-8"))
+
+def submit_job(video_id, video_url):
+    """Queues a caption job, returning (response body, HTTP status, extra headers)."""
+    if job_queue:
+        job = job_queue.enqueue(video_id, video_url)
+        return {
+            "message": f"Job for {video_id} received and queued for processing.",
+            "state": job["state"]
+        }, 200, {}
+    
+    try:
+        job = scheduler.submit(video_id, video_url)
+    except QueueFull as e:
+        return {"error": "Job queue is full", "retryAfter": e.retry_after}, 429, {'Retry-After': str(e.retry_after)}
+    
+    info = scheduler.status(video_id) or job
+    return {
+        "message": f"Job for {video_id} received and queued for processing.",
+        "queuePosition": info.get("queuePosition", 0)
+    }, 200, {}
+
+def job_status(video_id):
+    info = scheduler.status(video_id)
+    if not info and job_queue:
+        info = job_queue.status(video_id)
+    return info
+
+@app.route('/healthz', methods=['GET'])
+def healthz_route():
+    return jsonify(health()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    body, content_type = telemetry.render_metrics()
+    return Response(body, mimetype=content_type)
 
 @app.route('/process', methods=['POST'])
 def process_video_route():
-    data = request.json
+    if not worker_secret_ok(request.headers.get('X-Worker-Secret')):
+        return jsonify({"error": "Unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
     video_id = data.get('videoId')
     video_url = data.get('videoUrl')
     
     if not video_id or not video_url:
         return jsonify({"error": "Missing videoId or videoUrl"}), 400
     
-    # Run task in background thread
-    import threading
-    threading.Thread(target=process_task, args=(video_id, video_url)).start()
+    body, code, headers = submit_job(video_id, video_url)
+    response = jsonify(body)
+    response.headers.update(headers)
+    return response, code
+
+@app.route('/jobs/<video_id>', methods=['GET'])
+def job_status_route(video_id):
+    info = job_status(video_id)
+    if not info:
+        return jsonify({"error": f"No job found for {video_id}"}), 404
+    return jsonify(info), 200
+
+def source_key(fingerprint):
+    """Key of a source's "source" entry; the same file under other transcript settings is a different entry."""
+    return content_hash(fingerprint, transcript_settings())
+
+def lookup_transcript(video_url):
+    """Returns (cached cues or None, source fingerprint) without downloading anything."""
+    fingerprint = source_fingerprint(video_url)
+    transcript_key = cache.get("source", source_key(fingerprint)) if fingerprint else None
+    cues = cache.get("transcript", transcript_key) if transcript_key else None
+    return cues, fingerprint
+
+def ingest_audio(video_id, video_url, fingerprint):
+    """Streams and decodes the source, returning (audio, transcript_key, cached cues or None)."""
+    audio = None
+    audio_key = None
+    if audio_store and fingerprint:
+        # A retry or another worker on this host may already have decoded this source
+        audio_key = cache.get("audio", fingerprint)
+        audio = audio_store.get(audio_key) if audio_key else None
+        if audio is not None:
+            print(f"[{video_id}] Decoded audio found in store, skipping download")
+    
+    if audio is None:
+        # Stream the download straight into ffmpeg; only the decoded audio is kept
+        set_stage(video_id, 'downloading')
+        sink = audio_store.writer() if audio_store else None
+        # Download and decode are one streamed step, so they share a span
+        with telemetry.span('download', video_id) as attrs:
+            audio = stream_audio(video_url, on_progress=lambda p: report_ingest_progress(video_id, p), sink=sink)
+            attrs['audioSeconds'] = round(len(audio) / SAMPLE_RATE, 1)
+        audio_key = sink.key if sink is not None else None
+        if audio_key and fingerprint:
+            cache.put("audio", fingerprint, audio_key)
     
-    return jsonify({"message": f"Job for {video_id} received and started background processing."}), 200
+    # Stored audio is already named by the sha256 of its PCM, so only hash it without a store
+    if not audio_key:
+        audio_key = hashlib.sha256(memoryview(audio).cast("B")).hexdigest()
+    transcript_key = content_hash(transcript_settings(), audio_key)
+    cues = cache.get("transcript", transcript_key)
+    if cues is not None:
+        print(f"[{video_id}] Transcript cache hit for audio")
+        if fingerprint:
+            cache.put("source", source_key(fingerprint), transcript_key)
+    return audio, transcript_key, cues
 
-def process_task(video_id, video_url):
-    video_path = f"video_{video_id}.mp4"
+def store_transcript(transcript_key, fingerprint, cues, audio_seconds=None):
+    cache.put("transcript", transcript_key, cues)
+    if audio_seconds is not None:
+        cache.put("duration", transcript_key, round(audio_seconds, 1))
+    if fingerprint:
+        cache.put("source", source_key(fingerprint), transcript_key)
+
+def cached_audio_seconds(fingerprint):
+    """Length of the audio behind a source's cached transcript, or None if it wasn't recorded."""
+    transcript_key = cache.get("source", source_key(fingerprint)) if fingerprint else None
+    return cache.get("duration", transcript_key) if transcript_key else None
+
+def write_captions(video_id, cues):
+    """Writes the raw VTT, then cleans and translates; returns ({lang: path}, scratch paths)."""
     vtt_path = f"raw_{video_id}_en.vtt"
     
-    try:
-        print(f"[{video_id}] Starting process for {video_url}")
-        
-        # 1. Download video
-        subprocess.run(["curl", "-L", "-o", video_path, video_url], check=True)
-        
-        # 2. Run WhisperX
-        device = "cuda" if os.getenv("USE_CUDA") == "true" else "cpu"
-        batch_size = 16 # reduce if low on GPU mem
-        compute_type = "float16" if device == "cuda" else "int8"
-        
-        print(f"[{video_id}] Loading model (large-v3) on {device}...")
-        model = whisperx.load_model("large-v3", device, compute_type=compute_type)
-        
-        print(f"[{video_id}] Transcribing...")
-        audio = whisperx.load_audio(video_path)
-        result = model.transcribe(audio, batch_size=batch_size)
-        
-        # Alignment (optional but recommended for better timing)
-        print(f"[{video_id}] Aligning results...")
-        model_a, metadata = whisperx.load_align_model(language_code="en", device=device)
-        result = whisperx.align(result["segments"], model_a, metadata, audio, device, return_char_alignments=False)
-        
-        # 3. Export to VTT
-        print(f"[{video_id}] Saving Raw VTT...")
-        generate_vtt(result["segments"], vtt_path)
-        
-        # 4. Phase 4: LLM Cleanup
-        db.collection('videoCaptions').document(video_id).update({
-            'captionStatus': 'cleaning'
-        })
-        
-        clean_vtt_path = cleanup_captions(video_id, vtt_path)
-        
-        # 5. Phase 5: Translation
-        db.collection('videoCaptions').document(video_id).update({
-            'captionStatus': 'translating'
+    # 3. Export to VTT
+    print(f"[{video_id}] Saving Raw VTT...")
+    with telemetry.span('generate_vtt', video_id, cues=len(cues)):
+        generate_vtt(cues, vtt_path)
+    
+    # 4. Phase 4: LLM Cleanup
+    set_stage(video_id, 'cleaning', {'captionStatus': 'cleaning'})
+    clean_cues = load_checkpoint(video_id, 'cleaned')
+    if clean_cues is None:
+        clean_cues = cleanup_captions(video_id, cues)
+        save_checkpoint(video_id, 'cleaned', clean_cues)
+    else:
+        print(f"[{video_id}] Resuming from cleanup checkpoint")
+    clean_vtt_path = f"{video_id}_en.vtt"
+    with telemetry.span('generate_vtt', video_id, cues=len(clean_cues)):
+        generate_vtt(clean_cues, clean_vtt_path)
+    
+    # 5. Phase 5: Translation
+    set_stage(video_id, 'translating', {'captionStatus': 'translating'})
+    paths = {'en': clean_vtt_path}
+    translated = load_checkpoint(video_id, 'translated')
+    if translated is None:
+        translated_paths = translate_all(video_id, clean_cues, LANGUAGES)
+        # A partial set would make a resumed job skip the languages that failed
+        if checkpoints and set(translated_paths) == set(LANGUAGES):
+            translated = {}
+            for lang, path in translated_paths.items():
+                with open(path, 'r', encoding='utf-8') as f:
+                    translated[lang] = f.read()
+            save_checkpoint(video_id, 'translated', translated)
+    else:
+        print(f"[{video_id}] Resuming from translation checkpoint ({len(translated)} languages)")
+        translated_paths = {}
+        for lang, vtt in translated.items():
+            translated_paths[lang] = f"{video_id}_{lang}.vtt"
+            with open(translated_paths[lang], 'w', encoding='utf-8') as f:
+                f.write(vtt)
+    paths.update(translated_paths)
+    return paths, [vtt_path]
+
+def publish_captions(video_id, paths, scratch=()):
+    """Uploads the caption files, marks the video ready and removes the local files."""
+    if not paths:
+        raise Exception("No caption files generated")
+
+    set_stage(video_id, 'uploading', {'captionStatus': 'uploading', 'vttFilesLocal': paths})
+    r2_vtt_paths = upload_to_r2(video_id, paths)
+    
+    if r2_vtt_paths:
+        set_stage(video_id, 'ready', {
+            'captionStatus': 'ready',
+            'vttFiles': r2_vtt_paths,
+            'completedAt': firestore.SERVER_TIMESTAMP,
+            # The final English track replaces the streamed partial one
+            'partialVttFile': firestore.DELETE_FIELD,
+            'progressSeconds': firestore.DELETE_FIELD
         })
-        
-        languages = {
-            'es': 'Spanish (Latin American)',
-            'fr': 'French',
-            'de': 'German',
-            'ja': 'Japanese',
-            'it': 'Italian'
-        }
-        
-        paths = {'en': clean_vtt_path}
-        for lang_code, lang_name in languages.items():
-            t_path = translate_captions(video_id, clean_vtt_path, lang_code, lang_name)
-            if t_path:
-                paths[lang_code] = t_path
-        
-        db.collection('videoCaptions').document(video_id).update({
-            'captionStatus': 'uploading',
-            'vttFilesLocal': paths
+        delete_partial_captions(video_id)
+        telemetry.count_job('ready')
+        if checkpoints:
+            checkpoints.clear(video_id)
+        print(f"[{video_id}] Job Complete! Status: ready")
+    else:
+        raise Exception("R2 upload failed for all files")
+
+    # Final Cleanup
+    for p in [*scratch, *paths.values()]:
+        if os.path.exists(p):
+            os.remove(p)
+
+def finish_captions(video_id, cues):
+    """Cleans, translates and uploads captions for transcribed cues, then marks the video ready."""
+    paths, scratch = write_captions(video_id, cues)
+    publish_captions(video_id, paths, scratch)
+
+def report_failure(video_id, e):
+    """Logs a failed job and marks its videoCaptions document as errored."""
+    error_trace = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+    telemetry.count_job('error')
+    print(f"[{video_id}] CRITICAL ERROR: {e}\n{error_trace}")
+    try:
+        set_stage(video_id, 'error', {
+            'captionStatus': 'error',
+            'error': str(e),
+            'errorTrace': error_trace,
+            'failedAt': firestore.SERVER_TIMESTAMP
         })
-        
-        if not paths:
-            raise Exception("No caption files generated")
+    except:
+        pass
 
-        r2_vtt_paths = upload_to_r2(video_id, paths)
-        
-        if r2_vtt_paths:
-            db.collection('videoCaptions').document(video_id).update({
-                'captionStatus': 'ready',
-                'vttFiles': r2_vtt_paths,
-                'completedAt': firestore.SERVER_TIMESTAMP
-            })
-            print(f"[{video_id}] Job Complete! Status: ready")
-        else:
-            raise Exception("R2 upload failed for all files")
-
-        # Final Cleanup
-        if os.path.exists(video_path):
-            os.remove(video_path)
-        for p in paths.values():
-            if os.path.exists(p):
-                os.remove(p)
+def load_checkpoint(video_id, stage):
+    return checkpoints.load(video_id, stage) if checkpoints else None
 
+def save_checkpoint(video_id, stage, data):
+    if checkpoints:
+        checkpoints.save(video_id, stage, data)
+
+# Pipeline stages. Each gets the job's context dict and leaves its results there for the next.
+# Download and decode are one streamed step, and alignment runs per transcription window.
+
+def stage_ingest(job):
+    """Resumes from a checkpoint or the transcript cache, else streams and decodes the source."""
+    video_id = job['videoId']
+    print(f"[{video_id}] Starting process for {job['videoUrl']}")
+    set_stage(video_id, 'starting', {'workerStartedAt': firestore.SERVER_TIMESTAMP})
+    job['cues'] = load_checkpoint(video_id, 'transcript')
+    if job['cues'] is not None:
+        print(f"[{video_id}] Resuming from transcript checkpoint")
+        job['checkpointed'] = True
+        return
+    
+    # 1. Skip download and transcription entirely if this exact source was seen before
+    job['cues'], job['fingerprint'] = lookup_transcript(job['videoUrl'])
+    if job['cues'] is not None:
+        print(f"[{video_id}] Transcript cache hit for source, skipping download")
+        return
+    job['audio'], job['transcriptKey'], job['cues'] = ingest_audio(video_id, job['videoUrl'], job['fingerprint'])
+
+def stage_transcribe(job):
+    """Runs WhisperX on the decoded audio unless the transcript is already known."""
+    video_id = job['videoId']
+    audio = job.pop('audio', None)
+    if job['cues'] is None:
+        # 2. Run WhisperX
+        duration = len(audio) / SAMPLE_RATE
+        profile = choose_profile(duration)
+        job['cues'] = transcribe_audio(
+            video_id, audio,
+            on_window=lambda so_far, progress: publish_partial_captions(video_id, so_far, progress, duration),
+            profile=profile
+        )
+        # The cache key assumes the default model and precision; don't let a backlog fallback stand in for it
+        if transcript_settings(profile) == transcript_settings():
+            store_transcript(job['transcriptKey'], job['fingerprint'], job['cues'], duration)
+    if not job.get('checkpointed'):
+        save_checkpoint(video_id, 'transcript', job['cues'])
+
+def stage_llm(job):
+    job['paths'], job['scratch'] = write_captions(job['videoId'], job['cues'])
+
+def stage_upload(job):
+    publish_captions(job['videoId'], job['paths'], job['scratch'])
+
+PIPELINE_STAGES = [
+    ('ingest', stage_ingest, int(os.getenv("INGEST_WORKERS", 2))),
+    ('transcribe', stage_transcribe, TRANSCRIPTION_SLOTS),
+    ('llm', stage_llm, int(os.getenv("LLM_STAGE_WORKERS", 4))),
+    ('upload', stage_upload, int(os.getenv("UPLOAD_STAGE_WORKERS", 2))),
+]
+
+def process_task(video_id, video_url):
+    """Runs every pipeline stage for one video in the calling thread."""
+    job = {'videoId': video_id, 'videoUrl': video_url}
+    try:
+        for _, stage_fn, _ in PIPELINE_STAGES:
+            stage_fn(job)
     except Exception as e:
-        error_trace = traceback.format_exc()
-        print(f"[{video_id}] CRITICAL ERROR: {e}\n{error_trace}")
-        try:
-            db.collection('videoCaptions').document(video_id).update({
-                'captionStatus': 'error',
-                'error': str(e),
-                'errorTrace': error_trace,
-                'failedAt': firestore.SERVER_TIMESTAMP
-            })
-        except:
-            pass
+        report_failure(video_id, e)
+        raise
+
+checkpoints = StageCheckpoints(s3, S3_BUCKET) if JOB_CHECKPOINTS else None
+job_queue = LeaseQueue(
+    lambda: db,
+    node_id=os.getenv("WORKER_NODE_ID"),
+    lease_seconds=int(os.getenv("JOB_LEASE_SECONDS", 120)),
+    heartbeat_seconds=int(os.getenv("JOB_HEARTBEAT_SECONDS", 30)),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", 3)),
+    checkpoints=checkpoints
+) if JOB_QUEUE == "firestore" else None
+
+# Bounded job queue feeding the stage pipeline; each transcription slot runs one video at a time
+scheduler = JobScheduler(
+    PIPELINE_STAGES,
+    slots=TRANSCRIPTION_SLOTS,
+    max_queue=int(os.getenv("MAX_QUEUED_JOBS", 8)),
+    handoff=int(os.getenv("PIPELINE_HANDOFF", 1)),
+    on_error=report_failure,
+    on_finish=job_queue.finished if job_queue else None
+)
+telemetry.track_queue_depth(scheduler.depth)
+
+def start_services():
+    """Starts the background machinery shared by the Flask and ASGI front ends."""
+    status.start()
+    scheduler.start()
+    if job_queue:
+        # Claims jobs from the shared queue as slots free up and re-queues jobs of dead workers
+        job_queue.start(scheduler, on_abandon=lambda video_id: report_failure(
+            video_id, RuntimeError(f"Job lease expired {job_queue.max_attempts} times, giving up")
+        ))
+    # Warm the model pool in the background so /healthz answers during loading
+    threading.Thread(target=warm_up_models, daemon=True).start()
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'backfill':
+        status.start()
+        import backfill
+        sys.exit(backfill.main(sys.argv[2:], sys.modules[__name__]))
+    
+    # Development server; production runs the ASGI front end (python asgi.py)
+    start_services()
     # Default port 5000
     app.run(host='0.0.0.0', port=int(os.getenv("PORT", 5000)))
@@ -0,0 +1,171 @@
+import gc
+import threading
+import time
+from collections import OrderedDict
+
+import whisperx
+
+import telemetry
+
+
+def available_memory_mb():
+    """Returns the host's available memory in MB, or None if it can't be read."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+class ModelPool:
+    """Process-wide registry of resident WhisperX ASR and alignment models.
+
+    Models are keyed by (kind, name, device, compute_type) and loaded at most
+    once; concurrent jobs asking for the same key wait on the same load. When
+    the pool holds more than `max_models` entries, the least recently used
+    model is evicted. Before a load, idle models are also evicted until the
+    host has room for it: the memory the model took the last time it was
+    loaded, or `min_free_mb` if it hasn't been loaded yet. Eviction stops as
+    soon as one doesn't give memory back (the allocator kept it, or a running
+    job still holds the model), and never touches the keys in `keep`, such
+    as the ASR model a job is about to pair with an alignment model.
+    """
+
+    def __init__(self, max_models=4, min_free_mb=2048):
+        self.max_models = max_models
+        self.min_free_mb = min_free_mb
+        self._models = OrderedDict()
+        # MB each model took when it was last loaded; outlives eviction
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _get(self, key, loader, keep=()):
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                entry["last_used"] = time.time()
+                entry["hits"] += 1
+                return entry["model"]
+
+        with self._key_lock(key):
+            # Another job may have finished loading while we waited
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    entry["hits"] += 1
+                    return entry["model"]
+
+            self._make_room(key, keep)
+            print(f"[pool] Loading {key[0]} model {key[1]} on {key[2]} ({key[3]})...")
+            free_before = available_memory_mb()
+            started = time.time()
+            model = loader()
+            load_seconds = time.time() - started
+            free_after = available_memory_mb()
+            if free_before is not None and free_after is not None:
+                self._sizes[key] = max(0, free_before - free_after)
+            print(f"[pool] Loaded {key[1]} in {load_seconds:.1f}s")
+            telemetry.observe_model_load(key[0], key[1], load_seconds)
+
+            with self._lock:
+                self._models[key] = {
+                    "model": model,
+                    "load_seconds": load_seconds,
+                    "loaded_at": time.time(),
+                    "last_used": time.time(),
+                    "hits": 1,
+                }
+                self._evict(keep=(key, *keep))
+            return model
+
+    def _make_room(self, key, keep=()):
+        """Evicts idle models, oldest first, until there is room to load `key`."""
+        needed_mb = self._sizes.get(key, self.min_free_mb)
+        with self._lock:
+            free_mb = available_memory_mb()
+            while free_mb is not None and free_mb < needed_mb:
+                victim = next((k for k in self._models if k not in keep), None)
+                if victim is None:
+                    break
+                self._evict_one(victim)
+                freed_mb = available_memory_mb()
+                if freed_mb is None or freed_mb <= free_mb:
+                    print(f"[pool] Evicting {victim[1]} freed no memory; loading {key[1]} with {free_mb} MB available")
+                    break
+                free_mb = freed_mb
+
+    def _evict(self, keep=()):
+        while len(self._models) > self.max_models:
+            victim = next((k for k in self._models if k not in keep), None)
+            if victim is None:
+                break
+            self._evict_one(victim)
+
+    def _evict_one(self, key):
+        entry = self._models.pop(key)
+        print(f"[pool] Evicting {key[0]} model {key[1]} on {key[2]} (idle {time.time() - entry['last_used']:.0f}s)")
+        del entry
+        gc.collect()
+        if key[2] == "cuda":
+            try:
+                import torch
+                torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    def get_asr(self, name, device, compute_type, threads=4, keep=()):
+        """Returns a resident WhisperX ASR model, loading it on first use."""
+        key = ("asr", name, device, compute_type)
+        return self._get(key, lambda: whisperx.load_model(name, device, compute_type=compute_type, threads=threads), keep)
+
+    def get_align(self, language_code, device, keep=()):
+        """Returns a resident (model, metadata) alignment pair for a language."""
+        key = ("align", language_code, device, "default")
+        return self._get(key, lambda: whisperx.load_align_model(language_code=language_code, device=device), keep)
+
+    def get_pipeline(self, name, device, compute_type, threads, language_code):
+        """Returns (asr model, (align model, metadata)); loading either one never evicts the other."""
+        asr_key = ("asr", name, device, compute_type)
+        align_key = ("align", language_code, device, "default")
+        model = self.get_asr(name, device, compute_type, threads, keep=(align_key,))
+        return model, self.get_align(language_code, device, keep=(asr_key,))
+
+    def warm_up(self, asr_models, align_languages, device, compute_type, threads=4):
+        """Loads the given ASR models and alignment languages ahead of the first job."""
+        for name in asr_models:
+            try:
+                self.get_asr(name, device, compute_type, threads)
+            except Exception as e:
+                print(f"[pool] Warm-up failed for {name}: {e}")
+        for lang in align_languages:
+            try:
+                self.get_align(lang, device)
+            except Exception as e:
+                print(f"[pool] Warm-up failed for align/{lang}: {e}")
+
+    def snapshot(self):
+        """Describes the resident models for health reporting."""
+        with self._lock:
+            return [
+                {
+                    "kind": key[0],
+                    "name": key[1],
+                    "device": key[2],
+                    "computeType": key[3],
+                    "loadSeconds": round(entry["load_seconds"], 3),
+                    "loadedAt": entry["loaded_at"],
+                    "lastUsed": entry["last_used"],
+                    "hits": entry["hits"],
+                }
+                for key, entry in self._models.items()
+            ]
@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at capacity."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """Bounded job queue feeding a pipeline of stages, each with its own workers.
+
+    `stages` is a list of (name, fn, workers). Every stage has `workers`
+    threads pulling from its own input queue; `fn(job)` gets the job's
+    context dict ({videoId, videoUrl} plus whatever earlier stages stored)
+    and the job then moves to the next stage's queue. Hand-off queues hold at
+    most `handoff` jobs per worker, and a worker that finds the next queue
+    full waits, so a slow stage pushes back on the ones before it instead
+    of piling up decoded audio. Different videos occupy different stages at
+    the same time: the transcriber moves on to the next video while earlier
+    ones are still in cleanup, translation or upload.
+
+    Only the first queue is bounded by `max_queue` and rejects with QueueFull.
+    A stage that raises fails the job: `on_error(video_id, exc)` is called and
+    the job goes no further. `on_finish(video_id, state)` is called after each
+    job with "done" or "error".
+    """
+
+    def __init__(self, stages, slots=1, max_queue=8, handoff=1, keep_finished=200,
+                 on_error=None, on_finish=None):
+        self.stages = [
+            {"name": name, "fn": fn, "workers": workers, "queue": deque(), "limit": max(1, workers * handoff),
+             "busy": 0, "processed": 0, "failed": 0, "busySeconds": 0.0}
+            for name, fn, workers in stages
+        ]
+        # The first queue is the admission queue
+        self.stages[0]["limit"] = max_queue
+        self.slots = slots
+        self.max_queue = max_queue
+        self.keep_finished = keep_finished
+        self.on_error = on_error
+        self.on_finish = on_finish
+        self._jobs = OrderedDict()
+        self._contexts = {}
+        self._cond = threading.Condition()
+        self._durations = deque(maxlen=20)
+        self._threads = []
+        self._started_at = None
+
+    @property
+    def _pending(self):
+        return self.stages[0]["queue"]
+
+    def start(self):
+        self._started_at = time.time()
+        for index, stage in enumerate(self.stages):
+            for i in range(stage["workers"]):
+                t = threading.Thread(target=self._run_worker, args=(index,), name=f"{stage['name']}-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, video_id, video_url):
+        """Queues a job and returns its record; re-submitting an active job is a no-op."""
+        with self._cond:
+            existing = self._jobs.get(video_id)
+            if existing and existing["state"] in ("queued", "running"):
+                return dict(existing)
+            if len(self._pending) >= self.max_queue:
+                raise QueueFull(self.retry_after())
+
+            job = {
+                "videoId": video_id,
+                "videoUrl": video_url,
+                "state": "queued",
+                "stage": "queued",
+                "enqueuedAt": time.time(),
+                "startedAt": None,
+                "finishedAt": None,
+            }
+            self._jobs[video_id] = job
+            self._jobs.move_to_end(video_id)
+            self._contexts[video_id] = {"videoId": video_id, "videoUrl": video_url}
+            self._pending.append(video_id)
+            self._cond.notify_all()
+            return dict(job)
+
+    def set_stage(self, video_id, stage):
+        with self._cond:
+            job = self._jobs.get(video_id)
+            if job:
+                job["stage"] = stage
+
+    def status(self, video_id):
+        """Returns a copy of the job record with its current queue position, or None."""
+        with self._cond:
+            job = self._jobs.get(video_id)
+            if not job:
+                return None
+            info = dict(job)
+            info["queuePosition"] = self._pending.index(video_id) + 1 if job["state"] == "queued" else 0
+            return info
+
+    def depth(self):
+        with self._cond:
+            running = sum(1 for j in self._jobs.values() if j["state"] == "running")
+            return {
+                "queued": len(self._pending),
+                "running": running,
+                "slots": self.slots,
+                "maxQueue": self.max_queue,
+                "stages": {s["name"]: {"waiting": len(s["queue"]), "busy": s["busy"]} for s in self.stages},
+            }
+
+    def stage_stats(self):
+        """Per-stage throughput and utilization since start()."""
+        with self._cond:
+            uptime = max(time.time() - (self._started_at or time.time()), 1e-6)
+            return {
+                s["name"]: {
+                    "workers": s["workers"],
+                    "waiting": len(s["queue"]),
+                    "busy": s["busy"],
+                    "processed": s["processed"],
+                    "failed": s["failed"],
+                    "avgSeconds": round(s["busySeconds"] / s["processed"], 2) if s["processed"] else None,
+                    "jobsPerHour": round(s["processed"] * 3600 / uptime, 1),
+                    "utilization": round(s["busySeconds"] / (s["workers"] * uptime), 3),
+                }
+                for s in self.stages
+            }
+
+    def retry_after(self):
+        """Estimates seconds until a queue slot frees up, from recent job durations."""
+        avg = sum(self._durations) / len(self._durations) if self._durations else 60
+        return max(1, int(avg * max(1, len(self._pending)) / self.slots))
+
+    def _run_worker(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            with self._cond:
+                while not stage["queue"]:
+                    self._cond.wait()
+                video_id = stage["queue"].popleft()
+                job = self._jobs[video_id]
+                if index == 0:
+                    job["state"] = "running"
+                    job["startedAt"] = time.time()
+                job["stage"] = stage["name"]
+                stage["busy"] += 1
+                context = self._contexts[video_id]
+                # A slot opened up in this queue
+                self._cond.notify_all()
+
+            started = time.time()
+            error = None
+            try:
+                stage["fn"](context)
+            except Exception as e:
+                error = e
+                print(f"[{video_id}] Job failed in {job['stage']}: {e}")
+                if self.on_error:
+                    try:
+                        self.on_error(video_id, e)
+                    except Exception as report_error:
+                        print(f"[{video_id}] Failure report failed: {report_error}")
+
+            with self._cond:
+                stage["busy"] -= 1
+                stage["busySeconds"] += time.time() - started
+                if error is None:
+                    stage["processed"] += 1
+                else:
+                    stage["failed"] += 1
+
+                if error is None and next_stage is not None:
+                    while len(next_stage["queue"]) >= next_stage["limit"]:
+                        self._cond.wait()
+                    next_stage["queue"].append(video_id)
+                    self._cond.notify_all()
+                    continue
+
+                state = "error" if error is not None else "done"
+                job["state"] = state
+                job["finishedAt"] = time.time()
+                self._contexts.pop(video_id, None)
+                self._durations.append(job["finishedAt"] - job["startedAt"])
+                self._trim()
+            if self.on_finish:
+                self.on_finish(video_id, state)
+
+    def _trim(self):
+        finished = [k for k, j in self._jobs.items() if j["state"] in ("done", "error")]
+        for k in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[k]
@@ -0,0 +1,162 @@
+"""Builds readable cues from WhisperX word timings.
+
+WhisperX segments follow sentences and VAD chunks, so a single segment can
+run for fifteen seconds and three lines. `Segmenter` regroups the aligned
+words into cues under a character budget (chars per line x lines per cue),
+a maximum duration and a reading-speed limit (a cue breaks before a word
+that would push it over `max_cps`, and a finished cue is stretched toward
+it when there is silence to use), preferring to break after
+sentence and clause punctuation. It is a single greedy pass that holds back
+at most one finished cue, so it works word by word as windows are
+transcribed, in time linear in the number of words.
+"""
+
+SENTENCE_END = (".", "?", "!", "…")
+CLAUSE_END = (",", ";", ":", "—")
+
+
+def balance_lines(text, max_chars_per_line=42, max_lines=2):
+    """Breaks cue text into up to `max_lines` lines of similar length."""
+    words = text.split()
+    text = " ".join(words)
+    if len(text) <= max_chars_per_line or max_lines < 2 or len(words) < 2:
+        return text
+
+    if max_lines == 2:
+        # Space closest to the middle that keeps both lines within the limit
+        best = None
+        pos = 0
+        for word in words[:-1]:
+            pos += len(word)
+            first, second = pos, len(text) - pos - 1
+            if first <= max_chars_per_line and second <= max_chars_per_line:
+                score = abs(first - second)
+                if best is None or score < best[0]:
+                    best = (score, pos)
+            pos += 1
+        if best is not None:
+            return text[:best[1]] + "\n" + text[best[1] + 1:]
+
+    # Greedy fill when no balanced split fits (long words or more than two lines)
+    lines = [words[0]]
+    for word in words[1:]:
+        if len(lines[-1]) + 1 + len(word) <= max_chars_per_line or len(lines) == max_lines:
+            lines[-1] += " " + word
+        else:
+            lines.append(word)
+    return "\n".join(lines)
+
+
+def iter_words(segments, to_time=None):
+    """Yields (start, end, word) from aligned segments.
+
+    Words WhisperX couldn't align (digits, symbols) have no timing; they
+    take the end of the word before them. A segment with no word list at all
+    is yielded whole.
+    """
+    to_time = to_time or (lambda t: t)
+    for seg in segments:
+        words = seg.get("words")
+        if not words:
+            if seg["text"].strip():
+                yield to_time(seg["start"]), to_time(seg["end"]), seg["text"].strip()
+            continue
+        last_end = seg["start"]
+        for word in words:
+            text = word.get("word", "").strip()
+            if not text:
+                continue
+            start = word.get("start", last_end)
+            end = word.get("end", start)
+            last_end = end
+            yield to_time(start), to_time(end), text
+
+
+class Segmenter:
+    """Streaming word-to-cue grouping; feed() words in time order, then flush()."""
+
+    def __init__(self, max_chars_per_line=42, max_lines=2, max_cps=17.0, min_seconds=1.0, max_seconds=7.0,
+                 max_gap_seconds=1.5):
+        self.max_chars_per_line = max_chars_per_line
+        self.max_lines = max_lines
+        self.max_chars = max_chars_per_line * max_lines
+        self.max_cps = max_cps
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.max_gap_seconds = max_gap_seconds
+        self._words = []
+        self._chars = 0
+        # Finished cue whose end may still stretch into the silence before the next word
+        self._held = None
+
+    def feed(self, start, end, word):
+        """Adds one word; returns the cues that are now final."""
+        out = []
+        if self._words:
+            cue_start = self._words[0][0]
+            last = self._words[-1]
+            chars = self._chars + 1 + len(word)
+            # Reading speed over the words' own span, once the cue is long enough to stand on its own
+            # (otherwise fast speech would be cut into one-word cues)
+            span = end - cue_start
+            too_fast = span >= self.min_seconds and chars > self.max_cps * span
+            if (chars > self.max_chars
+                    or too_fast
+                    or end - cue_start > self.max_seconds
+                    or start - last[1] > self.max_gap_seconds
+                    or self._good_break(last[2])):
+                self._close(out)
+        if self._held is not None and not self._words:
+            out.append(self._release(start))
+        self._words.append((start, end, word))
+        self._chars += len(word) + (1 if len(self._words) > 1 else 0)
+        return out
+
+    def flush(self):
+        """Returns whatever is left once the words run out."""
+        out = []
+        self._close(out)
+        if self._held is not None:
+            out.append(self._release(None))
+        return out
+
+    def _good_break(self, previous_word):
+        """Ends a cue early at punctuation once it's reasonably full."""
+        if previous_word.endswith(SENTENCE_END):
+            return self._chars >= self.max_chars * 0.4
+        if previous_word.endswith(CLAUSE_END):
+            return self._chars >= self.max_chars * 0.7
+        return False
+
+    def _close(self, out):
+        if not self._words:
+            return
+        if self._held is not None:
+            out.append(self._release(self._words[0][0]))
+        text = " ".join(w[2] for w in self._words)
+        self._held = {"start": self._words[0][0], "end": self._words[-1][1], "text": text}
+        self._words = []
+        self._chars = 0
+
+    def _release(self, next_start):
+        """Finalizes the held cue, lengthening it toward the reading-speed and minimum-duration targets."""
+        cue = self._held
+        self._held = None
+        wanted = max(len(cue["text"]) / self.max_cps, self.min_seconds)
+        end = max(cue["end"], cue["start"] + wanted)
+        if next_start is not None:
+            # Never run into the next cue
+            end = min(end, next_start)
+        cue["end"] = max(end, cue["end"])
+        cue["text"] = balance_lines(cue["text"], self.max_chars_per_line, self.max_lines)
+        return cue
+
+
+def resegment(segments, to_time=None, **limits):
+    """Regroups aligned WhisperX segments into readable cues."""
+    segmenter = Segmenter(**limits)
+    cues = []
+    for start, end, word in iter_words(segments, to_time):
+        cues.extend(segmenter.feed(start, end, word))
+    cues.extend(segmenter.flush())
+    return cues
@@ -0,0 +1,102 @@
+import threading
+import time
+
+TERMINAL_STAGES = ("ready", "error")
+
+
+def deep_merge(base, update):
+    """Merges `update` into `base` in place; nested dicts merge, other values overwrite."""
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            deep_merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+class StatusReporter:
+    """Coalesces videoCaptions status writes and commits them in batches.
+
+    Updates for the same document within `flush_interval` are merged in call
+    order, so the last write wins and threads can't reorder each other. Every
+    flush writes all dirty documents, across all jobs, in a single batched
+    commit (split at `max_batch` writes). Terminal stages flush immediately.
+
+    `stage()` also records how long the previous stage took under
+    `stageTimings.<stage>` on the same document.
+    """
+
+    def __init__(self, get_db, collection="videoCaptions", flush_interval=1.0, max_batch=400):
+        self.get_db = get_db
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending = {}
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.commits = 0
+        self.writes = 0
+
+    def start(self):
+        threading.Thread(target=self._run, name="status-flush", daemon=True).start()
+
+    def update(self, video_id, fields, flush=False):
+        with self._lock:
+            deep_merge(self._pending.setdefault(video_id, {}), fields)
+        if flush:
+            self.flush()
+
+    def stage(self, video_id, stage, fields=None, flush=False):
+        """Moves a job to `stage`, closing out the timing of the stage it was in."""
+        now = time.time()
+        payload = {"workerStage": stage}
+        with self._lock:
+            previous = self._stages.get(video_id)
+            if previous and previous[0] != stage:
+                payload["stageTimings"] = {previous[0]: round(now - previous[1], 3)}
+            if stage in TERMINAL_STAGES:
+                self._stages.pop(video_id, None)
+            elif not previous or previous[0] != stage:
+                self._stages[video_id] = (stage, now)
+        if fields:
+            deep_merge(payload, fields)
+        self.update(video_id, payload, flush=flush or stage in TERMINAL_STAGES)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+
+            db = self.get_db()
+            if db is None:
+                print(f"[status] Firestore unavailable, dropping {len(pending)} update(s)")
+                return
+
+            items = list(pending.items())
+            for i in range(0, len(items), self.max_batch):
+                group = items[i:i + self.max_batch]
+                batch = db.batch()
+                for video_id, fields in group:
+                    batch.set(db.collection(self.collection).document(video_id), fields, merge=True)
+                try:
+                    batch.commit()
+                    self.commits += 1
+                    self.writes += len(group)
+                except Exception as e:
+                    print(f"[status] Batch commit of {len(group)} update(s) failed: {e}")
+                    # Put them back underneath anything newer that arrived meanwhile
+                    with self._lock:
+                        for video_id, fields in group:
+                            newer = self._pending.get(video_id, {})
+                            self._pending[video_id] = deep_merge(fields, newer)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[status] Flush failed: {e}")
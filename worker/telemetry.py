@@ -0,0 +1,95 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    print("Warning: prometheus_client not installed. Install with: pip install prometheus-client", file=sys.stderr)
+
+# Buckets from sub-second uploads up to hour-long transcriptions
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 2400, 3600)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+
+class _Noop:
+    """Stands in for a metric when prometheus_client is missing."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, *args):
+        pass
+
+    def inc(self, *args):
+        pass
+
+    def set_function(self, fn):
+        pass
+
+
+if PROMETHEUS_AVAILABLE:
+    STAGE_SECONDS = Histogram("caption_stage_seconds", "Duration of caption pipeline stages",
+                              ["stage", "outcome"], buckets=STAGE_BUCKETS)
+    MODEL_LOAD_SECONDS = Histogram("caption_model_load_seconds", "Time to load a model into the pool",
+                                   ["kind", "model"], buckets=STAGE_BUCKETS)
+    LLM_REQUEST_SECONDS = Histogram("caption_openai_request_seconds", "OpenAI chat completion latency",
+                                    ["outcome"], buckets=LLM_BUCKETS)
+    LLM_TOKENS = Counter("caption_openai_tokens_total", "OpenAI tokens used", ["kind"])
+    JOBS = Counter("caption_jobs_total", "Caption jobs by outcome", ["outcome"])
+    QUEUE_DEPTH = Gauge("caption_queue_depth", "Caption jobs waiting or running", ["state"])
+else:
+    STAGE_SECONDS = MODEL_LOAD_SECONDS = LLM_REQUEST_SECONDS = LLM_TOKENS = JOBS = QUEUE_DEPTH = _Noop()
+
+
+def log_event(event, **fields):
+    """Writes one structured JSON log line."""
+    print(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, default=str), flush=True)
+
+
+@contextmanager
+def span(stage, video_id=None, **attrs):
+    """Times a pipeline stage, logging it as a structured span and recording it in the stage histogram."""
+    started = time.time()
+    outcome = "ok"
+    try:
+        yield attrs
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        seconds = time.time() - started
+        STAGE_SECONDS.labels(stage=stage, outcome=outcome).observe(seconds)
+        log_event("span", stage=stage, videoId=video_id, seconds=round(seconds, 3), outcome=outcome, **attrs)
+
+
+def observe_model_load(kind, model, seconds):
+    MODEL_LOAD_SECONDS.labels(kind=kind, model=model).observe(seconds)
+
+
+def observe_llm_request(seconds, outcome, usage=None):
+    LLM_REQUEST_SECONDS.labels(outcome=outcome).observe(seconds)
+    if usage is not None:
+        LLM_TOKENS.labels(kind="prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+        LLM_TOKENS.labels(kind="completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def count_job(outcome):
+    JOBS.labels(outcome=outcome).inc()
+
+
+def track_queue_depth(depth_fn):
+    """Reads queue depth from `depth_fn()` at scrape time."""
+    QUEUE_DEPTH.labels(state="queued").set_function(lambda: depth_fn()["queued"])
+    QUEUE_DEPTH.labels(state="running").set_function(lambda: depth_fn()["running"])
+
+
+def render_metrics():
+    """Returns (body, content_type) for the /metrics endpoint."""
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client not installed\n", CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
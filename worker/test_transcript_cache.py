@@ -0,0 +1,49 @@
+"""Transcript cache keys must change with the transcription settings.
+
+Run from the worker directory with the worker's requirements installed:
+
+    python -m pytest test_transcript_cache.py
+"""
+
+import pytest
+
+import main as worker
+from cache import ContentCache
+
+VIDEO_URL = "https://example.com/clip.mp4"
+CUES = [{"start": 0.0, "end": 1.5, "text": "hello there"}]
+
+
+@pytest.fixture
+def cached_source(tmp_path, monkeypatch):
+    """A fresh cache holding one transcript stored under the current settings."""
+    monkeypatch.setattr(worker, "cache", ContentCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20))
+    monkeypatch.setattr(worker, "source_fingerprint", lambda url: "fingerprint-of-" + url)
+    fingerprint = worker.source_fingerprint(VIDEO_URL)
+    worker.store_transcript("transcript-key", fingerprint, CUES)
+    return fingerprint
+
+
+def test_same_settings_hit(cached_source):
+    cues, fingerprint = worker.lookup_transcript(VIDEO_URL)
+    assert cues == CUES
+    assert fingerprint == cached_source
+
+
+def test_transcript_version_change_misses(cached_source, monkeypatch):
+    monkeypatch.setattr(worker, "TRANSCRIPT_VERSION", worker.TRANSCRIPT_VERSION + "-next")
+    cues, _ = worker.lookup_transcript(VIDEO_URL)
+    assert cues is None
+
+
+def test_model_change_misses(cached_source, monkeypatch):
+    monkeypatch.setitem(worker.autotuner.base, "model", worker.autotuner.base["model"] + "-other")
+    cues, _ = worker.lookup_transcript(VIDEO_URL)
+    assert cues is None
+
+
+def test_cue_limits_change_misses(cached_source, monkeypatch):
+    monkeypatch.setattr(worker, "RESEGMENT_CUES", True)
+    monkeypatch.setitem(worker.CUE_LIMITS, "max_chars_per_line", worker.CUE_LIMITS["max_chars_per_line"] + 1)
+    cues, _ = worker.lookup_transcript(VIDEO_URL)
+    assert cues is None
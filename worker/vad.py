@@ -0,0 +1,128 @@
+"""Voice activity pre-pass: find speech in decoded audio before it reaches WhisperX.
+
+Lobby music, menus and silent gameplay are cut out, the remaining speech is
+packed back to back with a short gap between regions, and `Layout` maps
+timestamps on the packed audio back onto the original timeline.
+"""
+
+import bisect
+import sys
+
+import numpy as np
+
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+    print("Warning: webrtcvad not installed, using the energy VAD. Install with: pip install webrtcvad", file=sys.stderr)
+
+FRAME_MS = 30
+# dB above the noise floor a frame needs to count as speech, per aggressiveness 0-3
+ENERGY_MARGIN_DB = (6.0, 9.0, 12.0, 15.0)
+# Frames quieter than this are never speech, whatever the noise floor
+ENERGY_FLOOR_DB = -55.0
+
+
+def _webrtc_flags(audio, sample_rate, aggressiveness):
+    vad = webrtcvad.Vad(aggressiveness)
+    frame = sample_rate * FRAME_MS // 1000
+    frames = len(audio) // frame
+    pcm = (np.clip(audio[:frames * frame], -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    step = frame * 2
+    return np.fromiter(
+        (vad.is_speech(pcm[i * step:(i + 1) * step], sample_rate) for i in range(frames)),
+        dtype=bool, count=frames
+    )
+
+
+def _energy_flags(audio, sample_rate, aggressiveness):
+    frame = sample_rate * FRAME_MS // 1000
+    frames = len(audio) // frame
+    if frames == 0:
+        return np.zeros(0, dtype=bool)
+    power = (audio[:frames * frame].reshape(frames, frame) ** 2).mean(axis=1)
+    db = 10 * np.log10(power + 1e-10)
+    noise_floor = np.percentile(db, 10)
+    threshold = max(noise_floor + ENERGY_MARGIN_DB[aggressiveness], ENERGY_FLOOR_DB)
+    return db > threshold
+
+
+def speech_regions(audio, sample_rate, aggressiveness=2, pad_seconds=0.3, merge_gap_seconds=0.8,
+                   min_speech_seconds=0.25):
+    """Returns [(start, end)] sample ranges containing speech.
+
+    `aggressiveness` (0-3) trades recall for how much non-speech is dropped.
+    Runs separated by less than `merge_gap_seconds` are joined, runs shorter
+    than `min_speech_seconds` are dropped as clicks, and every region is
+    widened by `pad_seconds` so word onsets and tails survive.
+    """
+    aggressiveness = min(max(int(aggressiveness), 0), 3)
+    if WEBRTCVAD_AVAILABLE and sample_rate in (8000, 16000, 32000, 48000):
+        flags = _webrtc_flags(audio, sample_rate, aggressiveness)
+    else:
+        flags = _energy_flags(audio, sample_rate, aggressiveness)
+    if not flags.any():
+        return []
+
+    # Start/end frame of every run of speech frames
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    frame_seconds = FRAME_MS / 1000
+    merge_gap = int(merge_gap_seconds / frame_seconds)
+    runs = []
+    for start, end in zip(starts, ends):
+        if runs and start - runs[-1][1] <= merge_gap:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+
+    frame = sample_rate * FRAME_MS // 1000
+    pad = int(pad_seconds * sample_rate)
+    min_frames = int(min_speech_seconds / frame_seconds)
+    regions = []
+    for start, end in runs:
+        if end - start < min_frames:
+            continue
+        lo = max(0, start * frame - pad)
+        hi = min(len(audio), end * frame + pad)
+        if regions and lo <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], hi)
+        else:
+            regions.append((lo, hi))
+    return regions
+
+
+class Layout:
+    """Speech regions packed into one buffer, with the offsets to map times back."""
+
+    def __init__(self, audio, regions, sample_rate, gap_seconds=0.2):
+        self.sample_rate = sample_rate
+        gap = np.zeros(int(gap_seconds * sample_rate), dtype=audio.dtype)
+        parts = []
+        self._packed_starts = []
+        self._pieces = []
+        pos = 0
+        for start, end in regions:
+            if parts:
+                parts.append(gap)
+                pos += len(gap)
+            parts.append(audio[start:end])
+            self._packed_starts.append(pos)
+            self._pieces.append((start, end - start))
+            pos += end - start
+        self.audio = np.concatenate(parts) if parts else audio[:0]
+        self.speech_samples = sum(length for _, length in self._pieces)
+
+    def to_original(self, seconds):
+        """Maps a time on the packed audio onto the original timeline.
+
+        Times inside a gap between regions snap to the end of the region before it.
+        """
+        sample = int(round(seconds * self.sample_rate))
+        i = max(bisect.bisect_right(self._packed_starts, sample) - 1, 0)
+        start, length = self._pieces[i]
+        offset = min(max(sample - self._packed_starts[i], 0), length)
+        return (start + offset) / self.sample_rate